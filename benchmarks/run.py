@@ -0,0 +1,244 @@
+"""
+Suite de benchmarks des fonctions coûteuses de `scripts/` sur des panels synthétiques.
+
+Exemples (depuis la racine du dépôt) :
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --entities 100000 --periods 50 --output big.json --baseline ""
+    python -m benchmarks.run --update-baseline
+
+Chaque benchmark est chronométré (meilleur temps sur `--repeat` exécutions) et son pic
+mémoire est mesuré avec tracemalloc lors d'une exécution séparée. Les résultats sont
+comparés à `benchmarks/baseline.json` lorsque la configuration est identique ; le code de
+sortie vaut 1 en cas de régression, de benchmark absent de la référence, ou si la référence
+vient d'un autre environnement (architecture ou version majeure.mineure de Python) sans
+`--allow-env-mismatch`.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from scripts import data_analysis as da  # noqa: E402
+from scripts import data_visualization as dv  # noqa: E402
+from scripts import regression as rg  # noqa: E402
+from scripts import rolling_indicators as ri  # noqa: E402
+
+from .synthetic import make_HDI_raw, make_cross_section, make_panel  # noqa: E402
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _trade(panel):
+    analyzer = da.TradeDataAnalyzer(panel[["country", "date", "Importations", "Exportations"]].copy())
+    analyzer.get_balance()
+    return analyzer.classify_exporters(threshold=0)
+
+
+def _hdi_clean(raw):
+    return da.HDIDataAnalyzer(raw).clean_data()
+
+
+def _hdi_aggregate(analyzer):
+    return analyzer.aggregated_HDI()
+
+
+def _weights_per_year(panel):
+    yearly, _ = da.compute_weightCountry(panel)
+    return yearly
+
+
+def build_benchmarks(config):
+    """
+    Construit les données synthétiques et renvoie {nom : (fonction, préparation des arguments)}.
+    La préparation est exécutée hors chronométrage avant chaque répétition, car certaines
+    fonctions modifient leur entrée sur place.
+    """
+    panel = make_panel(
+        n_entities=config["entities"],
+        n_periods=config["periods"],
+        missing_rate=config["missing"],
+        n_indicators=config["indicators"],
+        seed=config["seed"],
+    )
+    imputed = da.impute_missing_values(panel.copy(), "PIB", method="mean").dropna(subset=["PIB"])
+    hdi_raw = make_HDI_raw(panel, seed=config["seed"])
+    hdi_analyzer = da.HDIDataAnalyzer(hdi_raw)
+    hdi_analyzer.clean_data()
+    weights_yearly = _weights_per_year(imputed)
+    _, weights = da.compute_weightCountry(imputed)
+    cross_section = make_cross_section(config["entities"], seed=config["seed"])
+    x_cols = ["HDI_mean", "isLandlocked", "netExportateur", "avgWeightCountry"]
+    grouped_section = cross_section.assign(cluster=cross_section.index % 8)
+
+    return {
+        "impute_missing_values[mean]": (da.impute_missing_values, lambda: (panel.copy(), "PIB", "mean")),
+        "impute_missing_values[ffill]": (da.impute_missing_values, lambda: (panel.copy(), "PIB", "forward_fill")),
+        "check_missing_values": (da.check_missing_values, lambda: (panel, "PIB")),
+        "TradeDataAnalyzer": (_trade, lambda: (panel,)),
+        "HDIDataAnalyzer.clean_data": (_hdi_clean, lambda: (hdi_raw,)),
+        "HDIDataAnalyzer.aggregated_HDI": (_hdi_aggregate, lambda: (hdi_analyzer,)),
+        "compute_weightCountry": (da.compute_weightCountry, lambda: (imputed,)),
+        "compute_response_times": (da.compute_response_times, lambda: (imputed,)),
+        "compute_rolling_indicators": (ri.compute_rolling_indicators, lambda: (panel, ["PIB", "Exportations"])),
+        "summarize_resilience": (ri.summarize_resilience, lambda: (panel, ["PIB", "Exportations"])),
+        "perform_regression": (rg.perform_regression, lambda: (cross_section, x_cols, "avgResponseTime")),
+        "perform_grouped_regression": (rg.perform_grouped_regression,
+                                       lambda: (grouped_section, x_cols, "avgResponseTime", "cluster")),
+        "cross_validate_specifications": (rg.cross_validate_specifications,
+                                          lambda: (cross_section, [x_cols[:k] for k in range(1, 5)], "avgResponseTime")),
+        "ordered_kmeans_clusters": (dv.ordered_kmeans_clusters, lambda: (weights, "avgWeightCountry", 4)),
+        "cluster_per_year": (dv.cluster_per_year, lambda: (weights_yearly, "weightCountry", "Power", 4)),
+    }
+
+
+def run_benchmark(func, make_args, repeat=3):
+    """
+    Renvoie le meilleur temps (s) de `func` sur `repeat` exécutions et son pic mémoire (octets).
+
+    Le pic mémoire est mesuré lors d'une exécution préalable sous tracemalloc, qui sert aussi
+    de préchauffage ; les exécutions chronométrées ne sont pas tracées, pour ne pas payer le
+    surcoût de tracemalloc. Les sorties console et les figures des fonctions mesurées sont ignorées.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        args = make_args()
+        tracemalloc.start()
+        func(*args)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        matplotlib.pyplot.close("all")
+
+        best_time = float("inf")
+        for _ in range(repeat):
+            args = make_args()
+            start = time.perf_counter()
+            func(*args)
+            best_time = min(best_time, time.perf_counter() - start)
+            matplotlib.pyplot.close("all")
+
+    return {"seconds": best_time, "peak_bytes": peak_bytes}
+
+
+# En dessous de cet écart absolu (en secondes), une différence de temps relève du bruit de mesure
+MIN_TIME_DELTA = 0.01
+
+
+def environment():
+    """
+    Clé d'environnement des résultats : l'architecture et la version majeure.mineure de Python,
+    assez grossière pour rester stable d'un poste ou d'un runner CI à l'autre.
+    """
+    return {"machine": platform.machine(), "python": ".".join(platform.python_version_tuple()[:2])}
+
+
+def compare(results, baseline, tolerance=0.25, allow_env_mismatch=False):
+    """
+    Compare des résultats à une référence. Renvoie la liste des régressions
+    (temps ou mémoire supérieurs de plus de `tolerance` à la référence). Un benchmark sans
+    entrée dans la référence compte aussi comme un échec : il faut régénérer la référence
+    avec `--update-baseline` dans la modification qui l'ajoute.
+
+    Une référence enregistrée sur un autre environnement (voir `environment`) est un échec,
+    sauf avec `allow_env_mismatch` : la comparaison a alors lieu avec un avertissement.
+    """
+    if baseline.get("config") != results["config"]:
+        print("Configuration différente de la référence : comparaison ignorée.")
+        return []
+
+    regressions = []
+    for key in ("machine", "python"):
+        if baseline.get(key) != results[key]:
+            print(f"Référence enregistrée sur un autre environnement ({key} : {baseline.get(key)!r}, "
+                  f"ici {results[key]!r}).")
+            if not allow_env_mismatch:
+                print("Régénérez-la avec --update-baseline, ou passez --allow-env-mismatch pour comparer quand même.")
+                return [("environment", key, None)]
+
+    for name, current in results["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            print(f"{name:<34} {'-':<10} {'':6}  MISSING (absent de la référence)")
+            regressions.append((name, "missing", None))
+            continue
+        for metric in ("seconds", "peak_bytes"):
+            ratio = current[metric] / reference[metric] if reference[metric] else 1.0
+            noise = metric == "seconds" and current[metric] - reference[metric] < MIN_TIME_DELTA
+            status = "REGRESSION" if ratio > 1 + tolerance and not noise else "ok"
+            print(f"{name:<34} {metric:<10} x{ratio:5.2f}  {status}")
+            if status != "ok":
+                regressions.append((name, metric, ratio))
+
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entities", type=int, default=1000, help="Nombre de pays synthétiques (défaut : 1000).")
+    parser.add_argument("--periods", type=int, default=35, help="Nombre d'années (défaut : 35).")
+    parser.add_argument("--missing", type=float, default=0.05, help="Taux de valeurs manquantes (défaut : 0.05).")
+    parser.add_argument("--indicators", type=int, default=3, help="Nombre d'indicateurs, au moins 3 (défaut : 3).")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du générateur (défaut : 0).")
+    parser.add_argument("--repeat", type=int, default=3, help="Nombre de répétitions par benchmark (défaut : 3).")
+    parser.add_argument("--only", nargs="*", help="Ne lancer que les benchmarks dont le nom contient l'un de ces motifs.")
+    parser.add_argument("--output", help="Fichier JSON dans lequel écrire les résultats.")
+    parser.add_argument("--baseline", default=BASELINE_PATH,
+                        help="Référence à laquelle comparer les résultats (chaîne vide pour ne pas comparer).")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Dégradation relative tolérée avant de signaler une régression (défaut : 0.25).")
+    parser.add_argument("--update-baseline", action="store_true", help="Écrire les résultats comme nouvelle référence.")
+    parser.add_argument("--allow-env-mismatch", action="store_true",
+                        help="Comparer même si la référence vient d'une autre architecture ou version de Python.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {
+        "entities": args.entities,
+        "periods": args.periods,
+        "missing": args.missing,
+        "indicators": args.indicators,
+        "seed": args.seed,
+    }
+
+    benchmarks = build_benchmarks(config)
+    if args.only:
+        benchmarks = {name: b for name, b in benchmarks.items() if any(p in name for p in args.only)}
+
+    results = {"config": config, **environment(), "platform": platform.platform(), "results": {}}
+    for name, (func, make_args) in benchmarks.items():
+        results["results"][name] = run_benchmark(func, make_args, repeat=args.repeat)
+        r = results["results"][name]
+        print(f"{name:<34} {r['seconds']:9.4f}s  {r['peak_bytes'] / 2**20:9.1f} MiB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, tolerance=args.tolerance, allow_env_mismatch=args.allow_env_mismatch):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
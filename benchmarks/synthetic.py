@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+
+
+INDICATOR_NAMES = ["PIB", "Importations", "Exportations"]
+
+
+def entity_codes(n_entities):
+    """
+    Codes d'entités synthétiques, uniques et de longueur fixe (par exemple 'E000042').
+    """
+    return np.char.add("E", np.char.zfill(np.arange(n_entities).astype(str), 6))
+
+
+def make_panel(n_entities=200, n_periods=35, missing_rate=0.05, n_indicators=3, start=1990, seed=0):
+    """
+    Génère un panel long synthétique au format de `WorldBankData.get_indicator`.
+
+    Le PIB suit une marche aléatoire géométrique avec des chocs négatifs ponctuels
+    (ce qui produit des épisodes pic-creux-dépassement), les importations et exportations
+    sont des pourcentages bruités, les indicateurs supplémentaires sont des marches aléatoires.
+
+    Paramètres
+    ----------
+    n_entities : int
+        Nombre de pays (ou d'entités).
+    n_periods : int
+        Nombre d'années.
+    missing_rate : float
+        Proportion de valeurs manquantes tirées au hasard dans chaque indicateur.
+    n_indicators : int
+        Nombre d'indicateurs (au moins 3 : PIB, Importations, Exportations ; les suivants
+        s'appellent IND3, IND4, ...).
+    start : int
+        Première année.
+    seed : int
+        Graine du générateur aléatoire.
+
+    Retours
+    -------
+    pandas.DataFrame
+        Colonnes `country`, `date` puis une colonne par indicateur.
+    """
+    if n_indicators < len(INDICATOR_NAMES):
+        raise ValueError(f"Il faut au moins {len(INDICATOR_NAMES)} indicateurs : {INDICATOR_NAMES}")
+
+    rng = np.random.default_rng(seed)
+    shape = (n_entities, n_periods)
+
+    growth = rng.normal(0.025, 0.03, size=shape)
+    growth -= rng.binomial(1, 0.08, size=shape) * rng.uniform(0.02, 0.15, size=shape)
+    level = rng.lognormal(mean=23, sigma=2, size=(n_entities, 1))
+    values = {"PIB": level * np.exp(np.cumsum(growth, axis=1))}
+
+    trade_level = rng.uniform(15, 60, size=(n_entities, 1))
+    values["Importations"] = trade_level + rng.normal(0, 4, size=shape)
+    values["Exportations"] = trade_level + rng.normal(0, 8, size=(n_entities, 1)) + rng.normal(0, 4, size=shape)
+
+    for i in range(len(INDICATOR_NAMES), n_indicators):
+        values[f"IND{i}"] = np.cumsum(rng.normal(0, 1, size=shape), axis=1)
+
+    data = {
+        "country": np.repeat(entity_codes(n_entities), n_periods),
+        "date": np.tile(np.arange(start, start + n_periods), n_entities),
+    }
+    for name, matrix in values.items():
+        flat = matrix.ravel()
+        flat[rng.random(flat.size) < missing_rate] = np.nan
+        data[name] = flat
+
+    return pd.DataFrame(data)
+
+
+def make_HDI_raw(panel, seed=0):
+    """
+    Génère une table brute d'IDH au format du fichier UNDP lu par `HDIDataAnalyzer`,
+    y compris des lignes d'agrégats régionaux (codes commençant par 'ZZ') à supprimer.
+    """
+    rng = np.random.default_rng(seed)
+    countries = panel["country"].unique()
+    years = panel["date"].unique()
+
+    base = rng.uniform(0.3, 0.9, size=(len(countries), 1))
+    hdi = np.clip(base + np.cumsum(rng.normal(0.003, 0.005, size=(len(countries), len(years))), axis=1), 0, 1)
+
+    regions = [f"ZZ{chr(65 + i)}" for i in range(5)]
+    codes = np.concatenate([countries, regions])
+    hdi = np.vstack([hdi, rng.uniform(0.4, 0.9, size=(len(regions), len(years)))])
+
+    return pd.DataFrame({
+        "countryIsoCode": np.repeat(codes, len(years)),
+        "country": np.repeat(codes, len(years)),
+        "indexCode": "HDI",
+        "year": np.tile(years, len(codes)),
+        "value": hdi.ravel(),
+    })
+
+
+def make_cross_section(n_entities=200, seed=0):
+    """
+    Génère un jeu de données par pays au format de `merged_data` (entrée de la régression).
+    """
+    rng = np.random.default_rng(seed)
+
+    data = pd.DataFrame({
+        "country": entity_codes(n_entities),
+        "HDI_mean": rng.uniform(0.3, 0.95, n_entities),
+        "isLandlocked": rng.binomial(1, 0.2, n_entities),
+        "netExportateur": rng.binomial(1, 0.4, n_entities),
+        "avgWeightCountry": rng.lognormal(-2, 1.5, n_entities),
+    })
+    data["avgResponseTime"] = (
+        3 - 1.5 * data["HDI_mean"] + 0.4 * data["isLandlocked"] - 0.2 * data["netExportateur"]
+        + rng.normal(0, 0.8, n_entities)
+    ).clip(lower=1)
+
+    return data
@@ -0,0 +1,309 @@
+"""
+Serveur local imitant l'API v2 de la Banque mondiale (`/v2/country/{pays}/indicator/{code}`).
+
+Il sert les copies locales `data/*.csv` ou un panel synthétique au même format JSON que
+`api.worldbank.org`, avec la pagination réelle (`page`, `pages`, `per_page`, `total`).
+Latence, taux d'erreur et limitation de débit sont configurables, ce qui permet de tester
+hors ligne le repli de `WorldBankData.get_indicator` et de mesurer la concurrence, le cache
+et les reprises des collecteurs.
+
+Exemples (depuis la racine du dépôt) :
+
+    python -m benchmarks.worldbank_server --port 8000 --latency 0.2 --error-rate 0.05
+    python -m benchmarks.worldbank_server --synthetic --entities 5000 --periods 60 --rate-limit 20
+
+puis, côté client :
+
+    WorldBankData(base_url="http://127.0.0.1:8000/v2").get_indicator("PIB", ["FRA", "DEU"])
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from scripts import data_cleaner as dcl
+from scripts.data_collector import WorldBankData
+
+from .synthetic import make_panel
+
+
+DEFAULT_PER_PAGE = 50
+
+
+class _TokenBucket:
+    """
+    Limitation de débit : `rate` requêtes par seconde en régime permanent, rafales de `burst`.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+class WorldBankReplayServer:
+    """
+    Serveur HTTP local compatible avec le format JSON de l'API v2 de la Banque mondiale.
+
+    Paramètres
+    ----------
+    indicators : dict
+        {code indicateur : DataFrame} ; chaque DataFrame contient les colonnes `country`
+        (nom affiché), `iso3`, `iso2`, `date` et `value`.
+    host, port : str, int
+        Adresse d'écoute (port 0 : choisi par le système).
+    latency : float
+        Latence ajoutée à chaque réponse, en secondes.
+    jitter : float
+        Variation aléatoire uniforme de la latence (± jitter), en secondes.
+    error_rate : float
+        Proportion de requêtes qui échouent avec une erreur HTTP 500.
+    rate_limit : float, optional
+        Débit maximal en requêtes par seconde ; au-delà, réponse 429 avec Retry-After.
+    seed : int
+        Graine du générateur aléatoire (latence et erreurs).
+    """
+
+    def __init__(self, indicators, host="127.0.0.1", port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, rate_limit=None, seed=0):
+        self.indicators = {code: self._prepare(data) for code, data in indicators.items()}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.bucket = _TokenBucket(rate_limit) if rate_limit else None
+        self.rng = np.random.default_rng(seed)
+        self.rng_lock = threading.Lock()
+        self.stats = {"requests": 0, "served": 0, "errors": 0, "rate_limited": 0, "bytes": 0}
+        self.stats_lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _prepare(data):
+        # Ordre de l'API : par pays, années décroissantes
+        data = data.sort_values(["iso3", "date"], ascending=[True, False]).reset_index(drop=True)
+        return {
+            "country": data["country"].to_numpy(dtype=object),
+            "iso3": data["iso3"].to_numpy(dtype=object),
+            "iso2": data["iso2"].to_numpy(dtype=object),
+            "date": data["date"].to_numpy(dtype=int),
+            "value": data["value"].to_numpy(dtype=float),
+        }
+
+    @classmethod
+    def from_backup(cls, iso_path="data/ISO_data.csv", **kwargs):
+        """
+        Serveur alimenté par les copies locales `WorldBankData.BACKUP_PATHS`.
+        Les noms de pays sont rapprochés des codes ISO avec `build_ISOMatchingDictionnary`.
+        """
+        ISOData = pd.read_csv(iso_path).drop(columns=['Unnamed: 0'])
+        iso2 = dict(zip(ISOData["ISO-3"], ISOData["ISO-2"]))
+
+        indicators = {}
+        matching = None
+        for name, code in WorldBankData.INDICATEURS.items():
+            data = pd.read_csv(WorldBankData.BACKUP_PATHS[name]).drop(columns=['Unnamed: 0'])
+            if matching is None:
+                matching = dcl.build_ISOMatchingDictionnary(data["country"].unique(), ISOData)
+            data["iso3"] = data["country"].map(matching).fillna("")
+            data["iso2"] = data["iso3"].map(iso2).fillna("")
+            indicators[code] = data.rename(columns={name: "value"})
+
+        return cls(indicators, **kwargs)
+
+    @classmethod
+    def from_panel(cls, panel, **kwargs):
+        """
+        Serveur alimenté par un panel long (`benchmarks.synthetic.make_panel`) dont la colonne
+        `country` contient des codes et les colonnes d'indicateurs portent les noms de
+        `WorldBankData.INDICATEURS`.
+        """
+        indicators = {}
+        for name, code in WorldBankData.INDICATEURS.items():
+            data = panel[["country", "date", name]].rename(columns={name: "value"})
+            data["iso3"] = data["country"]
+            data["iso2"] = data["country"].str[:2]
+            indicators[code] = data
+        return cls(indicators, **kwargs)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self):
+        """
+        Démarre le serveur dans un thread d'arrière-plan et renvoie son URL de base.
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key, n=1):
+        with self.stats_lock:
+            self.stats[key] += n
+
+    def _random(self):
+        with self.rng_lock:
+            return self.rng.random()
+
+    def query(self, countries, code, params):
+        """
+        Construit la réponse JSON (liste [métadonnées, observations]) d'une requête.
+        """
+        if code not in self.indicators:
+            return [{"message": [{"id": "175", "key": "Invalid format",
+                                  "value": "The indicator was not found. It may have been deleted or archived."}]}]
+
+        table = self.indicators[code]
+        mask = np.ones(len(table["date"]), dtype=bool)
+        if countries.lower() != "all":
+            mask &= np.isin(table["iso3"], [c.upper() for c in countries.split(";")])
+
+        try:
+            date = params.get("date", [None])[0]
+            if date:
+                start, _, end = date.partition(":")
+                mask &= (table["date"] >= int(start)) & (table["date"] <= int(end or start))
+            per_page = max(1, int(params.get("per_page", [DEFAULT_PER_PAGE])[0]))
+            page = max(1, int(params.get("page", [1])[0]))
+        except ValueError:
+            return [{"message": [{"id": "120", "key": "Invalid value",
+                                  "value": "The provided parameter value is not valid"}]}]
+
+        rows = np.flatnonzero(mask)
+        total = len(rows)
+        pages = max(1, -(-total // per_page))
+        rows = rows[(page - 1) * per_page:page * per_page]
+
+        metadata = {"page": page, "pages": pages, "per_page": per_page, "total": total,
+                    "sourceid": "2", "lastupdated": "2025-01-01"}
+        records = [
+            {
+                "indicator": {"id": code, "value": code},
+                "country": {"id": table["iso2"][i], "value": table["country"][i]},
+                "countryiso3code": table["iso3"][i],
+                "date": str(table["date"][i]),
+                "value": None if np.isnan(table["value"][i]) else float(table["value"][i]),
+                "unit": "",
+                "obs_status": "",
+                "decimal": 0,
+            }
+            for i in rows
+        ]
+        return [metadata, records or None]
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, headers=None):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json;charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+                server._count("bytes", len(payload))
+
+            def do_GET(self):
+                server._count("requests")
+
+                if server.bucket is not None and not server.bucket.acquire():
+                    server._count("rate_limited")
+                    return self._send(429, {"message": "Too Many Requests"}, {"Retry-After": "1"})
+
+                delay = server.latency + server.jitter * (2 * server._random() - 1)
+                if delay > 0:
+                    time.sleep(delay)
+
+                if server.error_rate and server._random() < server.error_rate:
+                    server._count("errors")
+                    return self._send(500, {"message": "Injected error"})
+
+                url = urlparse(self.path)
+                parts = [p for p in url.path.split("/") if p]
+                if len(parts) != 5 or parts[0] != "v2" or parts[1] != "country" or parts[3] != "indicator":
+                    return self._send(404, {"message": f"Unknown path {url.path}"})
+
+                server._count("served")
+                self._send(200, server.query(parts[2], parts[4], parse_qs(url.query)))
+
+        return Handler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.worldbank_server", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latence par requête en secondes (défaut : 0).")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Variation de la latence en secondes (défaut : 0).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion d'erreurs 500 (défaut : 0).")
+    parser.add_argument("--rate-limit", type=float, help="Requêtes par seconde au-delà desquelles on répond 429.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--synthetic", action="store_true", help="Servir un panel synthétique au lieu de data/*.csv.")
+    parser.add_argument("--entities", type=int, default=200, help="Avec --synthetic : nombre de pays (défaut : 200).")
+    parser.add_argument("--periods", type=int, default=35, help="Avec --synthetic : nombre d'années (défaut : 35).")
+    parser.add_argument("--missing", type=float, default=0.05, help="Avec --synthetic : taux de manquants (défaut : 0.05).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    options = dict(host=args.host, port=args.port, latency=args.latency, jitter=args.jitter,
+                   error_rate=args.error_rate, rate_limit=args.rate_limit, seed=args.seed)
+
+    if args.synthetic:
+        panel = make_panel(n_entities=args.entities, n_periods=args.periods, missing_rate=args.missing, seed=args.seed)
+        server = WorldBankReplayServer.from_panel(panel, **options)
+    else:
+        server = WorldBankReplayServer.from_backup(**options)
+
+    print(f"Serveur World Bank local sur {server.base_url} (Ctrl+C pour arrêter)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
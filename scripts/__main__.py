@@ -0,0 +1,65 @@
+import argparse
+import os
+
+import matplotlib
+
+# Exécution sans interface graphique : les plt.show() deviennent sans effet
+matplotlib.use("Agg")
+
+from . import instrumentation  # noqa: E402
+from .data_collector import WorldBankData  # noqa: E402
+from .pipeline import HDI_PATH, run_pipeline  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m scripts",
+        description="Exécute l'analyse complète (collecte, nettoyage, régression, export) sans notebook.",
+    )
+    parser.add_argument("--start", type=int, default=1990, help="Première année demandée (défaut : 1990).")
+    parser.add_argument("--end", type=int, default=2024, help="Dernière année demandée (défaut : 2024).")
+    parser.add_argument("--offline", action="store_true", help="N'utiliser que les copies locales de data/.")
+    parser.add_argument("--output-dir", default="output", help="Dossier d'export des résultats (défaut : output).")
+    parser.add_argument("--hdi-path", default=HDI_PATH, help=f"Fichier Excel de l'IDH (défaut : {HDI_PATH}).")
+    parser.add_argument("--missing-treshold", type=float, default=0.1,
+                        help="Proportion de valeurs manquantes au-delà de laquelle un pays est retiré (défaut : 0.1).")
+    parser.add_argument("--workers", type=int, default=6, help="Nombre de sources collectées en parallèle (défaut : 6).")
+    parser.add_argument("--processes", type=int,
+                        help="Nombre de processus pour l'imputation et les temps de réponse (défaut : séquentiel).")
+    parser.add_argument("--base-url", default=WorldBankData.BASE_URL,
+                        help=f"Racine de l'API World Bank (défaut : {WorldBankData.BASE_URL}).")
+    parser.add_argument("--profile", metavar="TRACE_PATH",
+                        help="Active l'instrumentation et écrit une trace Chrome (et un JSON .events.json à côté).")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="Avec --profile, mesure aussi le pic mémoire de chaque fonction (plus lent).")
+    parser.add_argument("--quiet", action="store_true", help="Ne pas afficher les temps par étape.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile:
+        instrumentation.enable(track_memory=args.profile_memory)
+
+    run_pipeline(
+        start=args.start,
+        end=args.end,
+        offline=args.offline,
+        output_dir=args.output_dir,
+        hdi_path=args.hdi_path,
+        missing_treshold=args.missing_treshold,
+        workers=args.workers,
+        base_url=args.base_url,
+        processes=args.processes,
+        verbose=not args.quiet,
+    )
+
+    if args.profile:
+        instrumentation.disable()
+        instrumentation.dump_trace(args.profile)
+        instrumentation.dump_json(os.path.splitext(args.profile)[0] + ".events.json")
+        print(instrumentation.summary().head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
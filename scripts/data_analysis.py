@@ -1,5 +1,13 @@
+import os
+
 import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .instrumentation import instrument
 
+@instrument
 def check_missing_values(data,col):
     """
     Vérifie et affiche le nombre et le pourcentage de valeurs manquantes dans la colonne spécifiée du DataFrame,
@@ -31,7 +39,28 @@ def check_missing_values(data,col):
     print(f"Il y a {missing_vals_number} valeurs manquantes sur un total de {total_values} dans la base de données.\nSoit un ratio de {(missing_vals_number/total_values)*100:.2f}% de valeurs manquantes dans la base de données.\n")
 
 
-def impute_missing_values(data,col,method="mean"):
+def _fill_mean_kernel(columns, col):
+    values = columns[col]
+    return np.where(np.isnan(values), np.nanmean(values) if not np.isnan(values).all() else np.nan, values)
+
+
+def _bfill_kernel(columns, col):
+    return pd.Series(columns[col]).bfill().to_numpy()
+
+
+def _ffill_kernel(columns, col):
+    return pd.Series(columns[col]).ffill().to_numpy()
+
+
+_IMPUTE_KERNELS = {
+    "mean": _fill_mean_kernel,
+    "backward_fill": _bfill_kernel,
+    "forward_fill": _ffill_kernel,
+}
+
+
+@instrument
+def impute_missing_values(data,col,method="mean",executor=None):
     """
     Impute les valeurs manquantes dans la colonne spécifiée du DataFrame en utilisant la méthode spécifiée.
 
@@ -43,6 +72,8 @@ def impute_missing_values(data,col,method="mean"):
         Le nom de la colonne dans laquelle imputer les valeurs manquantes.
     method : str, optional
         La méthode à utiliser pour l'imputation. Par défaut "mean". Autres options possibles : "median", "ffill", "bfill".
+    executor : SharedPanelExecutor, optional
+        Si fourni, l'imputation est calculée pays par pays sur un pool de processus.
 
     Retours
     -------
@@ -50,7 +81,9 @@ def impute_missing_values(data,col,method="mean"):
         Le DataFrame avec les valeurs manquantes imputées.
     """
     
-    if method == "mean":
+    if executor is not None and method in _IMPUTE_KERNELS:
+        data[col] = executor.transform(data, "country", [col], _IMPUTE_KERNELS[method], col=col)
+    elif method == "mean":
         data[col] = data.groupby("country")[col].transform(lambda x: x.fillna(x.mean()))
     elif method == "backward_fill":
         data[col] = data.groupby("country")[col].transform(lambda x: x.bfill())
@@ -60,19 +93,158 @@ def impute_missing_values(data,col,method="mean"):
     return data
     
 
+@instrument
+def get_countries_with_missing_values(data, col, treshold):
+    """
+    Renvoie les pays dont le nombre de valeurs manquantes dans la colonne spécifiée dépasse
+    une proportion `treshold` du nombre d'observations par pays.
+
+    Paramètres
+    ----------
+    data : pandas.DataFrame
+        Le DataFrame contenant une colonne 'country' et la colonne à analyser.
+    col : str
+        Le nom de la colonne pour laquelle les valeurs manquantes sont évaluées.
+    treshold : float
+        Une valeur entre 0 et 1 (par exemple 0.1 pour 10%).
+
+    Retours
+    -------
+    pandas.Series
+        Le nombre de valeurs manquantes des pays concernés, indexé par pays.
+    """
+
+    subset_data = data.groupby(["country"])[col]
+    missing_values = subset_data.apply(lambda x: x.isna().sum())
+    total_values_per_country = subset_data.apply(lambda x: len(x)).iloc[0]
+    return missing_values.loc[missing_values > int(treshold*total_values_per_country)]
+
+
+@instrument
+def compute_weightCountry(PIB_data):
+    """
+    Associe à chaque pays son poids (en %) dans le PIB mondial, année par année, puis en moyenne.
+
+    Paramètres
+    ----------
+    PIB_data : pandas.DataFrame
+        Doit contenir : `country`, `date`, `PIB`.
+
+    Retours
+    -------
+    tuple(pandas.DataFrame, pandas.DataFrame)
+        - le poids annuel (`country`, `date`, `weightCountry`)
+        - le poids moyen par pays (`country`, `avgWeightCountry`)
+    """
+
+    world_PIB = PIB_data.groupby("date")["PIB"].transform("sum")
+    yearly = PIB_data[["country", "date"]].copy()
+    yearly["weightCountry"] = 100*PIB_data["PIB"]/world_PIB
+
+    weightCountry = yearly.groupby("country")["weightCountry"].mean().reset_index()
+    weightCountry.rename(columns={"weightCountry":"avgWeightCountry"},inplace=True)
+
+    return yearly, weightCountry
+
+
+@instrument
+def peak_to_breach_times(df_country):
+    """
+    Calcule le temps moyen (en années) entre un pic local du PIB et la première année où
+    ce pic est dépassé, pour les pics suivis d'une baisse.
+
+    Paramètres
+    ----------
+    df_country : pandas.DataFrame
+        La série d'un pays, avec les colonnes `date` et `PIB`.
+
+    Retours
+    -------
+    float
+        Le temps de réponse moyen, NaN si aucun épisode pic-creux-dépassement n'est observé.
+    """
+
+    # Ordonner le dataframe pour que les séries temporelles commencent avec des dates croissantes
+    df = df_country.sort_values('date').reset_index(drop=True).copy()
+
+    df['prev_pib'] = df['PIB'].shift(1)
+    df['next_pib'] = df['PIB'].shift(-1)
+    df['is_peak'] = (df['PIB'] > df['prev_pib']) & (df['PIB'] > df['next_pib']) # Identifier les pics locaux i.e les années où le PIB est plus élevé que l'année précédente et l'année suivante
+
+    peak_indices = df.index[df['is_peak']].tolist()
+
+    times = []
+
+    for i in peak_indices:
+        peak_year = df.loc[i, 'date']
+        peak_val = df.loc[i, 'PIB']
+
+        # données survenues après le pic
+        after_thePeak = df.loc[i+1:].copy()
+        if after_thePeak.empty:
+            continue
+
+        # Si aucune valeur dans la suite n'est inférieure au pic, il n'y a pas eu de crise après ce pic
+        if not (after_thePeak['PIB'] < peak_val).any():
+            continue
+
+        # Sinon on cherche la première année où le PIB dépasse le pic pour signaler un retour à la normale
+        breached = after_thePeak[after_thePeak['PIB'] > peak_val]
+        if breached.empty:
+            continue
+
+        breach_year = breached['date'].iloc[0]
+        times.append(breach_year - peak_year)
+
+    return np.mean(times) if len(times) > 0 else np.nan # Permet de calculer un temps moyen sinon on retourne NaN
+
+
+def _peak_to_breach_kernel(columns):
+    return peak_to_breach_times(pd.DataFrame({"date": columns["date"], "PIB": columns["PIB"]}))
+
+
+@instrument
+def compute_response_times(PIB_data, executor=None):
+    """
+    Calcule le temps de réponse moyen aux crises (`avgResponseTime`) de chaque pays.
+
+    Paramètres
+    ----------
+    PIB_data : pandas.DataFrame
+        Doit contenir : `country`, `date`, `PIB`.
+    executor : SharedPanelExecutor, optional
+        Si fourni, les temps de réponse sont calculés pays par pays sur un pool de processus.
+
+    Retours
+    -------
+    pandas.DataFrame
+        Colonnes `country` et `avgResponseTime` (NaN pour les pays sans épisode de crise).
+    """
+
+    if executor is not None:
+        responseTime_data = executor.apply(PIB_data, "country", ["date", "PIB"], _peak_to_breach_kernel)
+        return responseTime_data.rename("avgResponseTime").rename_axis("country").reset_index()
+
+    responseTime_data = PIB_data.groupby('country')[['date','PIB']].apply(peak_to_breach_times).rename("avgResponseTime")
+    return responseTime_data.reset_index()
+
+
 class TradeDataAnalyzer:
 
     def __init__(self, trade_data):
         self.trade_data = trade_data
         
+    @instrument
     def get_balance(self) -> pd.DataFrame:
         self.commercialBalance = self.trade_data['Exportations'] - self.trade_data['Importations']
         self.trade_data['commBalance'] = self.commercialBalance
     
+    @instrument
     def aggregate_commercialBalance(self) -> pd.DataFrame:
         aggregated_data = self.trade_data.groupby('country')['commBalance'].mean().reset_index()
         return aggregated_data
 
+    @instrument
     def classify_exporters(self, threshold=0) -> pd.DataFrame:
 
         aggregated_data = self.aggregate_commercialBalance()
@@ -90,6 +262,7 @@ class HDIDataAnalyzer:
     def __init__(self, HDI_data):
         self.rawData = HDI_data
 
+    @instrument
     def clean_data(self):
         """
         Nettoyage des données :
@@ -104,6 +277,7 @@ class HDIDataAnalyzer:
         self.cleaned_data.drop(indexes,inplace=True)
         return self.cleaned_data
 
+    @instrument
     def aggregated_HDI(self):
         """
         Agrégation par pays ISO-3 :
@@ -112,4 +286,570 @@ class HDIDataAnalyzer:
         agg_df = self.cleaned_data.groupby('country')['HDI'].agg(['mean']).reset_index()
         agg_df.rename(columns={'mean':'HDI_mean'}, inplace=True)
 
-        return agg_df
\ No newline at end of file
+        return agg_df
+
+class KLLSketch:
+    """
+    Sketch de quantiles KLL (Karnin, Lang & Liberty), fusionnable et alimenté par blocs.
+
+    On conserve une pile de compacteurs : le niveau h contient des valeurs de poids 2^h.
+    Lorsqu'un niveau dépasse sa capacité, on le trie et on promeut une valeur sur deux
+    au niveau supérieur. La mémoire reste en O(k log(n/k)) quel que soit le nombre n
+    de valeurs vues, et l'erreur de rang est de l'ordre de 1/k.
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.n = 0
+        self.min = np.nan
+        self.max = np.nan
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # Un élément non apparié reste au niveau courant
+                keep = items[:len(items) % 2]
+                paired = items[len(keep):]
+                promoted = paired[self._rng.integers(2)::2]
+                self.levels[level] = keep
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """
+        Ajoute un bloc de valeurs au sketch (les NaN sont ignorés).
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.n += len(values)
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Fusionne un autre sketch dans celui-ci, niveau par niveau.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.n += other.n
+        self.min = np.nanmin([self.min, other.min])
+        self.max = np.nanmax([self.max, other.max])
+        self._compress()
+        return self
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(lvl), 2 ** h, dtype=float) for h, lvl in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def rank(self, x):
+        """
+        Rang normalisé approché de x : proportion des valeurs vues inférieures ou égales à x.
+        """
+        if self.n == 0:
+            return np.full(np.shape(x), np.nan) if np.ndim(x) else np.nan
+        items, cum_weights = self._weighted_items()
+        pos = np.searchsorted(items, x, side="right")
+        cum = np.concatenate([[0.0], cum_weights])[pos]
+        return cum / cum_weights[-1]
+
+    def quantile(self, q):
+        """
+        Quantile(s) approché(s) d'ordre q (scalaire ou tableau de valeurs dans [0, 1]).
+        """
+        q = np.asarray(q, dtype=float)
+        if self.n == 0:
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+
+        items, cum_weights = self._weighted_items()
+        pos = np.searchsorted(cum_weights, q * cum_weights[-1], side="left")
+        result = items[np.clip(pos, 0, len(items) - 1)]
+        # Les extrêmes sont connus exactement
+        result = np.where(q <= 0, self.min, np.where(q >= 1, self.max, result))
+        return result if result.ndim else float(result)
+
+
+class QuantileSketches:
+    """
+    Ensemble de sketches KLL par indicateur, en version poolée (toutes années confondues)
+    et par année, alimentés bloc par bloc.
+
+    Permet de découper la distribution d'un indicateur en quantiles sans charger tout le
+    panel en mémoire, par exemple à partir de `pd.read_csv(..., chunksize=...)`.
+    """
+
+    def __init__(self, k=200, date_col="date", seed=42):
+        self.k = k
+        self.date_col = date_col
+        self.seed = seed
+        self.pooled = {}
+        self.per_year = {}
+
+    def _sketch(self, store, key):
+        if key not in store:
+            store[key] = KLLSketch(k=self.k, seed=self.seed)
+        return store[key]
+
+    @instrument
+    def update(self, data, cols):
+        """
+        Met à jour les sketches avec un bloc du panel.
+
+        Paramètres
+        ----------
+        data : pandas.DataFrame
+            Un bloc du panel, contenant `date_col` et les colonnes `cols`.
+        cols : str ou list[str]
+            Les indicateurs à intégrer.
+        """
+        cols = [cols] if isinstance(cols, str) else cols
+        for col in cols:
+            self._sketch(self.pooled, col).update(data[col].to_numpy())
+            for year, values in data.groupby(self.date_col)[col]:
+                self._sketch(self.per_year, (col, year)).update(values.to_numpy())
+        return self
+
+    @classmethod
+    def from_chunks(cls, chunks, cols, **kwargs):
+        """
+        Construit les sketches à partir d'un itérable de blocs (DataFrame).
+        """
+        sketches = cls(**kwargs)
+        for chunk in chunks:
+            sketches.update(chunk, cols)
+        return sketches
+
+    @instrument
+    def merge(self, other):
+        """
+        Fusionne les sketches d'un autre objet (par exemple calculés sur une autre partition).
+        """
+        for col, sketch in other.pooled.items():
+            self._sketch(self.pooled, col).merge(sketch)
+        for key, sketch in other.per_year.items():
+            self._sketch(self.per_year, key).merge(sketch)
+        return self
+
+    def get(self, col, year=None):
+        store, key = (self.pooled, col) if year is None else (self.per_year, (col, year))
+        if key not in store:
+            raise KeyError(f"Aucun sketch pour {key}. Utilisez update() d'abord.")
+        return store[key]
+
+    def years(self, col):
+        return sorted(year for c, year in self.per_year if c == col)
+
+    def quantile(self, col, q, year=None):
+        return self.get(col, year).quantile(q)
+
+    def rank(self, col, x, year=None):
+        return self.get(col, year).rank(x)
+
+    def quantile_edges(self, col, q=20, year=None):
+        """
+        Bornes des q intervalles de quantiles (q+1 valeurs, extrêmes compris).
+        """
+        return self.get(col, year).quantile(np.linspace(0, 1, q + 1))
+
+    @instrument
+    def assign_quantiles(self, data, col, q=20, per_year=False):
+        """
+        Affecte chaque ligne de `data` à son quantile, à la manière de `pd.qcut(labels=False)`.
+
+        Paramètres
+        ----------
+        data : pandas.DataFrame
+            Le panel (ou un bloc du panel) à étiqueter.
+        col : str
+            L'indicateur à découper.
+        q : int, défaut=20
+            Nombre de quantiles.
+        per_year : bool, défaut=False
+            Si True, les quantiles sont calculés année par année au lieu d'être poolés.
+
+        Retours
+        -------
+        pandas.Series
+            Numéro de quantile (0 à q-1) par ligne, NaN si la valeur est manquante.
+        """
+        values = data[col].to_numpy(dtype=float)
+        labels = np.full(len(values), np.nan)
+
+        if per_year:
+            dates = data[self.date_col].to_numpy()
+            groups = [(year, dates == year) for year in np.unique(dates)]
+        else:
+            groups = [(None, np.ones(len(values), dtype=bool))]
+
+        for year, mask in groups:
+            edges = self.quantile_edges(col, q=q, year=year)
+            labels[mask] = np.clip(np.searchsorted(edges[1:-1], values[mask], side="left"), 0, q - 1)
+
+        labels[np.isnan(values)] = np.nan
+        return pd.Series(labels, index=data.index, name=col)
+
+
+class IncrementalAggregates:
+    """
+    Agrégats par pays et par indicateur mis à jour incrémentalement à l'arrivée de nouvelles années.
+
+    Pour chaque (indicateur, pays), on conserve la somme, le nombre d'observations, le minimum
+    et le maximum, ainsi que les `history` dernières années (la « fenêtre »). Pour la série du
+    temps de réponse (le PIB par défaut), on conserve l'état des épisodes pic-dépassement : la
+    somme et le nombre des temps déjà résolus, les pics encore en attente de dépassement et les
+    deux dernières valeurs de la série ; et le même état arrêté juste avant la fenêtre.
+
+    Ajouter une année ne touche donc que les lignes nouvelles : O(pays) au lieu de
+    O(pays × années), et l'état enregistré ne grossit pas avec l'historique. Une révision (ou
+    une année manquante ajoutée après coup) dans la fenêtre reste exacte : on retire l'ancienne
+    valeur des sommes, et les extrema ou les épisodes du pays concerné sont recalculés à partir
+    de l'état arrêté avant la fenêtre, en rejouant au plus `history` années. Une révision plus
+    ancienne que la fenêtre lève une ValueError : il faut alors reconstruire les agrégats depuis
+    l'historique complet.
+
+    Exemple
+    -------
+    >>> agg = IncrementalAggregates()
+    >>> agg.update(PIB_Reel_data_final, ["PIB"])          # historique complet, une seule fois
+    >>> agg.save("aggregates.pkl")
+    >>> agg = IncrementalAggregates.load("aggregates.pkl")
+    >>> agg.update(PIB_2025, ["PIB"])                     # seulement la nouvelle année
+    >>> agg.response_times()
+    """
+
+    def __init__(self, response_col="PIB", history=10):
+        self.response_col = response_col
+        self.history = history
+        self.stats = {}           # {indicateur : {pays : agrégats et fenêtre, voir `_new_record`}}
+        self.episodes = {}        # {pays : état des épisodes pic-dépassement}
+        self.base_episodes = {}   # {pays : état des épisodes avant la fenêtre}
+
+    @staticmethod
+    def _new_record():
+        # Somme, nombre et extrema sur toutes les années ; extrema et dernière année hors fenêtre
+        return {"sum": 0.0, "count": 0, "min": np.nan, "max": np.nan,
+                "window": {}, "base_min": np.nan, "base_max": np.nan, "base_end": None, "last_date": None}
+
+    @staticmethod
+    def _new_episode_state():
+        return {"sum": 0.0, "count": 0, "pending": [], "prev": np.nan, "last": np.nan, "last_date": None}
+
+    @staticmethod
+    def _advance(state, date, value):
+        """
+        Fait avancer l'état des épisodes d'une année, selon les règles de `peak_to_breach_times`.
+        """
+        # La dernière valeur devient un pic si elle dépasse ses deux voisines
+        if state["last_date"] is not None and state["last"] > state["prev"] and state["last"] > value:
+            state["pending"].append((state["last_date"], state["last"]))
+
+        still_pending = []
+        for peak_date, peak_val in state["pending"]:
+            if value > peak_val:
+                state["sum"] += date - peak_date
+                state["count"] += 1
+            else:
+                still_pending.append((peak_date, peak_val))
+        state["pending"] = still_pending
+
+        state["prev"], state["last"], state["last_date"] = state["last"], value, date
+
+    def _replay_episodes(self, country):
+        base = self.base_episodes.setdefault(country, self._new_episode_state())
+        state = dict(base, pending=list(base["pending"]))
+        window = self.stats[self.response_col][country]["window"]
+        for date in sorted(window):
+            self._advance(state, date, window[date])
+        self.episodes[country] = state
+
+    def _evict(self, col, country, record):
+        """
+        Sort l'année la plus ancienne de la fenêtre : elle ne compte plus que dans les agrégats
+        et, pour la série du temps de réponse, dans l'état des épisodes avant la fenêtre.
+        """
+        date = min(record["window"])
+        value = record["window"].pop(date)
+        record["base_min"] = np.fmin(record["base_min"], value)
+        record["base_max"] = np.fmax(record["base_max"], value)
+        record["base_end"] = date
+        if col == self.response_col:
+            self._advance(self.base_episodes.setdefault(country, self._new_episode_state()), date, value)
+
+    @instrument
+    def update(self, delta, cols):
+        """
+        Intègre un lot de lignes (pays, année) nouvelles ou révisées.
+
+        Paramètres
+        ----------
+        delta : pandas.DataFrame
+            Colonnes `country`, `date` et les indicateurs `cols`.
+        cols : str ou list[str]
+            Les indicateurs à agréger.
+
+        Exceptions
+        ----------
+        ValueError
+            Si une ligne porte sur une année antérieure à la fenêtre conservée pour son pays.
+        """
+        cols = [cols] if isinstance(cols, str) else cols
+        delta = delta.sort_values("date")
+        countries = delta["country"].to_numpy()
+        dates = delta["date"].to_numpy()
+
+        for col in cols:
+            stats = self.stats.setdefault(col, {})
+            replay = set()
+
+            for country, date, value in zip(countries, dates, delta[col].to_numpy(dtype=float)):
+                record = stats.setdefault(country, self._new_record())
+                if record["base_end"] is not None and date <= record["base_end"]:
+                    raise ValueError(
+                        f"{col}, {country} : l'année {date} est antérieure à la fenêtre de {self.history} années "
+                        f"conservée (après {record['base_end']}). Reconstruisez les agrégats depuis l'historique complet."
+                    )
+
+                window = record["window"]
+                revised = date in window
+                late = record["last_date"] is not None and date < record["last_date"]
+                old = window.get(date, np.nan)
+                window[date] = value
+                record["last_date"] = date if record["last_date"] is None else max(record["last_date"], date)
+
+                if not np.isnan(old):
+                    record["sum"] -= old
+                    record["count"] -= 1
+                if not np.isnan(value):
+                    record["sum"] += value
+                    record["count"] += 1
+                    record["min"] = np.fmin(record["min"], value)
+                    record["max"] = np.fmax(record["max"], value)
+                if not np.isnan(old) and (old == record["min"] or old == record["max"]):
+                    # L'ancienne valeur était un extremum : on le recalcule depuis la fenêtre
+                    values = np.fromiter(window.values(), dtype=float, count=len(window))
+                    record["min"] = np.fmin.reduce(np.append(values, record["base_min"]))
+                    record["max"] = np.fmax.reduce(np.append(values, record["base_max"]))
+
+                if col == self.response_col:
+                    state = self.episodes.setdefault(country, self._new_episode_state())
+                    if revised or late:
+                        replay.add(country)
+                    elif country not in replay:
+                        self._advance(state, date, value)
+
+                if len(window) > self.history:
+                    self._evict(col, country, record)
+
+            for country in replay:
+                self._replay_episodes(country)
+
+        return self
+
+    def aggregates(self, col):
+        """
+        Renvoie les agrégats courants d'un indicateur.
+
+        Retours
+        -------
+        pandas.DataFrame
+            Colonnes `country`, `count`, `sum`, `mean`, `min`, `max`.
+        """
+        if col not in self.stats:
+            raise KeyError(f"Aucun agrégat pour {col}. Utilisez update() d'abord.")
+
+        stats = self.stats[col]
+        data = pd.DataFrame([[r["sum"], r["count"], r["min"], r["max"]] for r in stats.values()],
+                            columns=["sum", "count", "min", "max"])
+        data.insert(0, "country", list(stats.keys()))
+        data["mean"] = data["sum"] / data["count"].where(data["count"] > 0)
+        return data[["country", "count", "sum", "mean", "min", "max"]].sort_values("country").reset_index(drop=True)
+
+    def mean(self, col, name=None):
+        """
+        Moyenne par pays d'un indicateur, au format des agrégats existants
+        (par exemple `mean("HDI", "HDI_mean")` pour `HDIDataAnalyzer.aggregated_HDI`,
+        `mean("commBalance")` pour `TradeDataAnalyzer.aggregate_commercialBalance`).
+        """
+        return self.aggregates(col)[["country", "mean"]].rename(columns={"mean": name or col})
+
+    def response_times(self):
+        """
+        Temps de réponse moyen par pays, identique à `compute_response_times` sur l'historique intégré.
+        """
+        data = pd.DataFrame({
+            "country": list(self.episodes.keys()),
+            "avgResponseTime": [s["sum"] / s["count"] if s["count"] else np.nan for s in self.episodes.values()],
+        })
+        return data.sort_values("country").reset_index(drop=True)
+
+    def save(self, path):
+        """
+        Enregistre l'état des agrégats sur disque (sommes, extrema, fenêtres et épisodes, sans
+        l'historique complet).
+        """
+        pd.to_pickle({"response_col": self.response_col, "history": self.history, "stats": self.stats,
+                      "episodes": self.episodes, "base_episodes": self.base_episodes}, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Recharge un état enregistré par `save`.
+        """
+        state = pd.read_pickle(path)
+        agg = cls(response_col=state["response_col"], history=state["history"])
+        agg.stats = state["stats"]
+        agg.episodes = state["episodes"]
+        agg.base_episodes = state["base_episodes"]
+        return agg
+
+
+def _run_shard(kernel, shared, groups, kwargs):
+    """
+    Exécuté dans un processus du pool : attache les blocs de mémoire partagée et applique
+    `kernel` à chaque groupe (start, stop) du lot, sans copier les colonnes.
+    """
+    blocks = {}
+    try:
+        for col, (name, dtype, length) in shared.items():
+            blocks[col] = shared_memory.SharedMemory(name=name)
+
+        arrays = {col: np.ndarray((length,), dtype=dtype, buffer=blocks[col].buf)
+                  for col, (name, dtype, length) in shared.items()}
+        results = []
+        for start, stop in groups:
+            result = kernel({col: array[start:stop] for col, array in arrays.items()}, **kwargs)
+            results.append(np.array(result, copy=True) if isinstance(result, np.ndarray) else result)
+        del arrays
+        return results
+    finally:
+        for block in blocks.values():
+            block.close()
+
+
+class SharedPanelExecutor:
+    """
+    Exécute des calculs par groupe (pays ou année) d'un panel sur un pool de processus.
+
+    Le panel est trié par groupe, puis chaque colonne numérique nécessaire est copiée une
+    seule fois dans un bloc de mémoire partagée : les processus lisent leurs tranches sans
+    sérialisation des données. Les groupes sont répartis en lots contigus de tailles
+    comparables et les résultats sont rassemblés dans l'ordre des groupes.
+
+    Les noyaux (`kernel`) sont des fonctions de niveau module, appelées avec un dictionnaire
+    {colonne : tableau numpy du groupe} et les paramètres supplémentaires.
+
+    Exemple
+    -------
+    >>> with SharedPanelExecutor(max_workers=8) as executor:
+    ...     PIB = impute_missing_values(PIB, "PIB", executor=executor)
+    ...     responseTime_data = compute_response_times(PIB, executor=executor)
+    """
+
+    def __init__(self, max_workers=None, tasks_per_worker=4):
+        # Même valeur par défaut que ProcessPoolExecutor, résolue ici pour dimensionner les lots
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.tasks_per_worker = tasks_per_worker
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _run(self, data, by, cols, kernel, kwargs):
+        # Comme groupby, les lignes dont la clé est manquante (code -1) sont écartées
+        codes, keys = pd.factorize(data[by], sort=True)
+        rows = np.flatnonzero(codes >= 0)
+        order = rows[np.argsort(codes[rows], kind="stable")]
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[rows], minlength=len(keys)))])
+        groups = list(zip(bounds[:-1], bounds[1:]))
+
+        # Lots contigus de groupes, de tailles (en lignes) comparables
+        n_tasks = max(1, min(len(groups), self.max_workers * self.tasks_per_worker))
+        cuts = np.searchsorted(bounds[1:], np.linspace(0, len(order), n_tasks + 1)[1:-1], side="left")
+        batches = [b.tolist() for b in np.split(np.arange(len(groups)), cuts + 1) if len(b)]
+
+        blocks, shared = [], {}
+        try:
+            for col in cols:
+                values = np.ascontiguousarray(data[col].to_numpy()[order])
+                block = shared_memory.SharedMemory(create=True, size=max(1, values.nbytes))
+                blocks.append(block)
+                np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+                shared[col] = (block.name, values.dtype.str, len(values))
+
+            futures = [self.pool.submit(_run_shard, kernel, shared, [groups[i] for i in batch], kwargs)
+                       for batch in batches]
+            results = [result for future in futures for result in future.result()]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+        return keys, order, results
+
+    @instrument
+    def apply(self, data, by, cols, kernel, **kwargs):
+        """
+        Équivalent parallèle de `data.groupby(by)[cols].apply(...)` : un résultat par groupe.
+
+        Retours
+        -------
+        pandas.Series
+            Les résultats du noyau, indexés par les clés de groupe triées.
+        """
+        keys, _, results = self._run(data, by, cols, kernel, kwargs)
+        return pd.Series(results, index=pd.Index(keys, name=by), dtype=object).infer_objects()
+
+    @instrument
+    def transform(self, data, by, cols, kernel, **kwargs):
+        """
+        Équivalent parallèle de `data.groupby(by)[col].transform(...)` : le noyau renvoie un
+        tableau de la taille du groupe, et les résultats sont replacés dans l'ordre des lignes de `data`.
+
+        Retours
+        -------
+        numpy.ndarray
+            Un tableau aligné sur les lignes de `data` (NaN pour les lignes dont la clé `by` manque).
+        """
+        _, order, results = self._run(data, by, cols, kernel, kwargs)
+        sorted_values = np.concatenate(results) if results else np.empty(0)
+        if len(order) == len(data):
+            out = np.empty_like(sorted_values)
+        else:
+            out = np.full(len(data), np.nan, dtype=np.result_type(sorted_values.dtype, float))
+        out[order] = sorted_values
+        return out
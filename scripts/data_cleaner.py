@@ -1,5 +1,8 @@
 import pandas as pd
 
+from .instrumentation import instrument
+
+@instrument
 def clean_landlockedData(rawData):
     """
     Nettoie les données brutes du tableau HTML des pays et leurs longueurs de côtes,
@@ -42,6 +45,7 @@ def clean_landlockedData(rawData):
     return data_countries.dropna().reset_index(drop=True)
 
 
+@instrument
 def clean_ISOData(rawData):
     """
     Nettoie les données brutes du tableau HTML des pays et leurs codes ISO,
@@ -86,3 +90,153 @@ def clean_ISOData(rawData):
     data_ISO.drop(columns=[2],axis=1,inplace=True)
     
     return data_ISO.reset_index(drop=True)
+
+
+# Pays que l'algorithme de rapprochement des noms ne peut pas résoudre seul :
+# nom World Bank -> nom de la table ISO (Wikipédia)
+MANUAL_NAME_MATCHES = {
+    'Congo, Dem. Rep.': 'Congo (the Democratic Republic of the)',
+    'Congo, Rep.': 'Congo (the)[k]',
+    'Turkiye': 'Türkiye[ag]',
+    'Korea, Rep.': 'Korea (the Republic of)[u]',
+    'Korea, Dem. People\'s Rep.': 'Korea (the Democratic People\'s Republic of)[t]',
+    'Venezuela, RB': 'Venezuela (Bolivarian Republic of)',
+    "Equatorial Guinea": "Equatorial Guinea",
+    "Guinea-Bissau": "Guinea-Bissau",
+    "Papua New Guinea": "Papua New Guinea",
+    "Sudan": "Sudan (the)",
+    "South Sudan": "South Sudan",
+    "Guinea": "Guinea",
+}
+
+# Nom World Bank -> code ISO-3, corrections appliquées après le rapprochement
+MANUAL_ISO_MATCHES = {
+    'Niger': 'NER',
+    'Nigeria': 'NGA',
+    'Ireland': "IRL",
+}
+
+# Noms de la table Wikipédia des côtes -> code ISO-3
+LANDLOCKED_ISO_MATCHES = {
+    "Russia": "RUS",
+    "Turkey": "TUR",
+    "Micronesia": "FSM",
+    "Bahamas": "BHS",
+    "Vietnam": "VNM",
+    "Somalia": "SOM",
+    "Venezuela": "VEN",
+    "French Polynesia": "PYF",
+    "North Korea": "PRK",
+    "Egypt": "EGY",
+    "Iran": "IRN",
+    "South Korea": "KOR",
+    "New Caledonia": "NCL",
+    "Yemen": "YEM",
+    "Taiwan": "TWN",
+    "Cape Verde": "CPV",
+    "Hong Kong": "HKG",
+    "Ivory Coast": "CIV",
+    "Puerto Rico": "PRI",
+    "São Tomé and Príncipe": "STP",
+    "Syria": "SYR",
+    "U.S. Virgin Islands": "VIR",
+    "Congo, Republic of the": "COG",
+    "Congo, Democratic Republic of the": "COD",
+    "Brunei": "BRN",
+    "Saint Lucia": "LCA",
+    "Bermuda": "BMU",
+    "Saint Vincent and the Grenadines": "VCT",
+    "Gambia": "GMB",
+    "Aruba": "ABW",
+    "Macau": "MAC",
+    "Czech Republic": "CZE",
+    "Kyrgyzstan": "KGZ",
+    "Laos": "LAO",
+    "Slovakia": "SVK",
+    "Swaziland": "SWZ",
+    "French Guiana": "GUF",
+    "Guadeloupe": "GLP",
+    "Martinique": "MTQ",
+    "Caribbean Netherlands": "BES",
+    "Réunion": "REU",
+}
+
+
+@instrument
+def build_ISOMatchingDictionnary(countries, ISOData):
+    """
+    Associe les noms de pays de la Banque mondiale à leurs codes ISO-3.
+
+    Un premier passage rapproche les noms dont l'un contient l'autre. Les noms restants
+    sont appariés par ordre alphabétique, puis les cas déviants sont corrigés à la main
+    (`MANUAL_NAME_MATCHES` et `MANUAL_ISO_MATCHES`).
+
+    Paramètres
+    ----------
+    countries : iterable
+        Les noms de pays tels que renvoyés par la Banque mondiale.
+    ISOData : pandas.DataFrame
+        La table nettoyée par `clean_ISOData`, avec les colonnes 'Pays' et 'ISO-3'.
+
+    Retours
+    -------
+    dict
+        Un dictionnaire {nom Banque mondiale : code ISO-3}.
+    """
+
+    WB_countries = set(countries)
+    ISO_countries = set(ISOData["Pays"].unique())
+
+    matching_dictionnary = {}
+    solved_ISO_countries = set()
+    solved_WB_countries = set()
+
+    # Premier algorithme de matching basé sur l'inclusion des noms ; à plusieurs candidats, le nom
+    # de longueur la plus proche l'emporte ("Dominica" est aussi inclus dans "Dominican Republic (the)")
+    for iso_country in sorted(ISO_countries):
+        for wb_country in WB_countries:
+            if iso_country in wb_country or wb_country in iso_country:
+                previous = matching_dictionnary.get(wb_country)
+                if previous is None or abs(len(iso_country) - len(wb_country)) < abs(len(previous) - len(wb_country)):
+                    matching_dictionnary[wb_country] = iso_country
+                solved_ISO_countries.add(iso_country)
+                solved_WB_countries.add(wb_country)
+
+    # Résoudre les derniers problèmes par ordre alphabétique
+    unresolved_WB = sorted(WB_countries - solved_WB_countries)
+    unresolved_ISO = sorted(ISO_countries - solved_ISO_countries)
+    for wb_country, iso_country in zip(unresolved_WB, unresolved_ISO):
+        matching_dictionnary[wb_country] = iso_country
+
+    # Résoudre les problèmes d'autres pays déviants manuellement
+    matching_dictionnary.update({k: v for k, v in MANUAL_NAME_MATCHES.items() if v in ISO_countries})
+
+    ISO_codes = dict(zip(ISOData["Pays"], ISOData["ISO-3"]))
+    finalMatchingDictionnary = {key: ISO_codes[value] for key, value in sorted(matching_dictionnary.items())}
+    finalMatchingDictionnary.update(MANUAL_ISO_MATCHES)
+
+    return finalMatchingDictionnary
+
+
+@instrument
+def apply_ISOMatching(data, matchingDictionnary, col="country"):
+    """
+    Remplace les noms de pays de la colonne `col` par leurs codes ISO-3 lorsqu'ils sont connus.
+
+    Paramètres
+    ----------
+    data : pandas.DataFrame
+        Le DataFrame à modifier.
+    matchingDictionnary : dict
+        Un dictionnaire {nom : code ISO-3}.
+    col : str, optional
+        La colonne contenant les noms de pays. Par défaut "country".
+
+    Retours
+    -------
+    pandas.DataFrame
+        Le DataFrame avec les codes ISO-3 à la place des noms reconnus.
+    """
+
+    data[col] = data[col].map(lambda x: matchingDictionnary.get(x, x))
+    return data
@@ -1,9 +1,16 @@
+import re
+import zipfile
+
 import requests
 import bs4
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+from matplotlib.colors import to_rgba_array
+
+from .instrumentation import count, instrument
+from .plotting import add_line_collection
 
 class WorldBankData:
     """
@@ -32,9 +39,32 @@ class WorldBankData:
         "Exportations": "data/Exportations_data.csv"
     }
 
-    def __init__(self):
+    BASE_URL = "https://api.worldbank.org/v2"
+
+    def __init__(self, base_url=BASE_URL, per_page=20000):
+        """
+        Paramètres
+        ----------
+        base_url : str, optional
+            Racine de l'API (par défaut l'API publique). Permet de pointer vers un serveur
+            local compatible, par exemple `benchmarks/worldbank_server.py`.
+        per_page : int, optional
+            Nombre d'observations demandées par page ; les pages suivantes sont récupérées
+            tant que `page < pages`.
+        """
+        self.base_url = base_url.rstrip("/")
+        self.per_page = per_page
         self.data = {}  # stocke les DataFrames par indicateur
+        self._log_matrices = {}  # {indicateur : (DataFrame source, matrice années × pays en log)}
 
+    def _get_page(self, url, page):
+        response = requests.get(f"{url}&page={page}", headers={"User-Agent": "Python for data science tutorial"})
+        count("bytes_fetched", len(response.content))
+        if response.status_code != 200:
+            raise ConnectionError(f"Erreur API : {response.status_code}")
+        return response.json()
+
+    @instrument
     def get_indicator(self, indicator_name, countries, start=2000, end=2024):
         """
         Récupère un indicateur pour plusieurs pays.
@@ -45,14 +75,12 @@ class WorldBankData:
 
         code = self.INDICATEURS[indicator_name]
         countries_str = ";".join([c.upper() for c in countries])
-        url = f"https://api.worldbank.org/v2/country/{countries_str}/indicator/{code}?date={start}:{end}&format=json&per_page=20000"
+        url = f"{self.base_url}/country/{countries_str}/indicator/{code}?date={start}:{end}&format=json&per_page={self.per_page}"
 
         try:
-            response = requests.get(url, headers={"User-Agent": "Python for data science tutorial"})
-            if response.status_code != 200:
-                raise ConnectionError(f"Erreur API : {response.status_code}")
-
-            data_json = response.json()[1]
+            metadata, data_json = self._get_page(url, 1)
+            for page in range(2, int(metadata["pages"]) + 1):
+                data_json = data_json + self._get_page(url, page)[1]
 
             df = pd.DataFrame(data_json)[["country", "date", "value"]]
             df["country"] = df["country"].apply(lambda x: x["value"])
@@ -60,53 +88,253 @@ class WorldBankData:
             df.rename(columns={"value":indicator_name},inplace=True)
 
             self.data[indicator_name] = df
+            self.invalidate(indicator_name)
             
             return df
         
         except Exception as e:
             print(f"Erreur lors de la récupération des données : {e}")
-            backup_path = self.BACKUP_PATHS.get(indicator_name)
+            return self.load_backup(indicator_name)
 
-            if not backup_path:
-                raise FileNotFoundError(f"Impossible de charger les données locales pour {indicator_name}.")
+    @instrument
+    def load_backup(self, indicator_name):
+        """
+        Charge la copie locale d'un indicateur (utilisée hors ligne ou si l'API échoue).
+        """
 
-            df = pd.read_csv(backup_path)
-            self.data[indicator_name] = df
-            df.drop(columns=['Unnamed: 0'], inplace=True)
-            print(f" Données locales chargées depuis {backup_path}")
+        backup_path = self.BACKUP_PATHS.get(indicator_name)
 
-            return df
+        if not backup_path:
+            raise FileNotFoundError(f"Impossible de charger les données locales pour {indicator_name}.")
+
+        df = pd.read_csv(backup_path)
+        self.data[indicator_name] = df
+        self.invalidate(indicator_name)
+        df.drop(columns=['Unnamed: 0'], inplace=True)
+        print(f" Données locales chargées depuis {backup_path}")
+
+        return df
         
-    sns.set_style("whitegrid")
-    
-    def plot(self, indicator_name, title=None, figsize=(10,6), colors=None):
+    @instrument
+    def load_bulk_archive(self, archive_path, indicators=None, countries=None, start=None, end=None):
+        """
+        Charge des indicateurs depuis l'archive zip WDI de la Banque mondiale (voir `read_WDI_archive`)
+        et les stocke dans `self.data`, au même format que `get_indicator`.
+
+        Paramètres
+        ----------
+        archive_path : str
+            Chemin de l'archive (par exemple `WDI_CSV.zip`).
+        indicators : dict ou list, optional
+            {nom : code} ou liste de codes (le code sert alors de nom). Par défaut `INDICATEURS`.
+        countries : list, optional
+            Codes ISO-3 à conserver. Par défaut tous.
+        start, end : int, optional
+            Bornes de la période.
+
+        Retours
+        -------
+        dict
+            {nom : DataFrame(country, date, nom)} pour chaque indicateur trouvé dans l'archive.
         """
-        Trace un indicateur pour tous les pays chargés.
+
+        if indicators is None:
+            indicators = self.INDICATEURS
+        if not isinstance(indicators, dict):
+            indicators = {code: code for code in indicators}
+
+        by_code = read_WDI_archive(archive_path, list(indicators.values()), countries=countries, start=start, end=end)
+
+        loaded = {}
+        for name, code in indicators.items():
+            if code in by_code:
+                df = by_code[code].rename(columns={"value": name})
+                self.data[name] = df
+                self.invalidate(name)
+                loaded[name] = df
+
+        return loaded
+
+    def invalidate(self, indicator_name=None):
         """
-        
+        Oublie la matrice en log mise en cache pour un indicateur (tous si None). À appeler après
+        une modification sur place de `self.data[indicator_name]` ; remplacer le DataFrame suffit.
+        """
+        if indicator_name is None:
+            self._log_matrices.clear()
+        else:
+            self._log_matrices.pop(indicator_name, None)
+
+    @instrument
+    def log_matrix(self, indicator_name):
+        """
+        Renvoie l'indicateur en log, au format large (une ligne par année, une colonne par pays).
+
+        La matrice est calculée une seule fois puis gardée en cache tant que `self.data[indicator_name]`
+        n'est pas remplacé (par `get_indicator`, `load_backup`, `load_bulk_archive` ou à la main).
+        Les valeurs nulles ou négatives valent NaN.
+
+        Paramètres
+        ----------
+        indicator_name : str
+            L'indicateur, chargé au format long (`country`, `date`, valeur) ou déjà au format large.
+
+        Retours
+        -------
+        pandas.DataFrame
+            La matrice années × pays, années croissantes.
+        """
+
         if indicator_name not in self.data:
             raise ValueError(f"Aucune donnée pour {indicator_name}. Utilisez get_indicator() d'abord.")
 
         df = self.data[indicator_name]
+        cached = self._log_matrices.get(indicator_name)
+        if cached is not None and cached[0] is df:
+            count("cache_hit:log_matrix")
+            return cached[1]
+        count("cache_miss:log_matrix")
 
-        plt.figure(figsize=figsize)
-
-        # Couleurs personnalisées
-        if colors:
-            for i, country in enumerate(df.columns):
-                plt.plot(df.index, np.log(df[country]), marker='x', label=country, color=colors[i])
+        if {"country", "date"}.issubset(df.columns):
+            value_col = indicator_name if indicator_name in df.columns else df.columns.drop(["country", "date"])[0]
+            wide = df.pivot_table(index="date", columns="country", values=value_col, aggfunc="mean", dropna=False)
         else:
-            for country in df.columns:
-                plt.plot(df.index, np.log(df[country]), marker='x', label=country)
-
-        plt.title(title if title else indicator_name, fontsize=16)
-        plt.xlabel("Année", fontsize=12)
-        plt.ylabel(indicator_name, fontsize=12)
-        plt.xticks(df.index, rotation=45)
-        plt.grid(True, linestyle='--', alpha=0.6)
-        plt.tight_layout()
+            wide = df
+        wide = wide.sort_index()
+
+        values = wide.to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            logged = np.where(values > 0, np.log(values), np.nan)
+        matrix = pd.DataFrame(logged, index=wide.index, columns=wide.columns)
+
+        self._log_matrices[indicator_name] = (df, matrix)
+        return matrix
+
+    sns.set_style("whitegrid")
+    
+    @instrument
+    def plot(self, indicator_name, title=None, figsize=(10,6), colors=None, countries=None):
+        """
+        Trace le log d'un indicateur pour les pays chargés (ou le sous-ensemble `countries`).
+
+        Toutes les séries sont dessinées en une seule `LineCollection` à partir de `log_matrix`,
+        si bien que retracer un autre sous-ensemble de pays ne refait ni le pivot ni le log.
+        """
+
+        matrix = self.log_matrix(indicator_name)
+        if countries is not None:
+            unknown = [c for c in countries if c not in matrix.columns]
+            if unknown:
+                raise ValueError(f"Pays absents de {indicator_name} : {unknown}")
+            matrix = matrix[list(countries)]
+
+        years = matrix.index.to_numpy(dtype=float)
+        values = matrix.to_numpy().T
+
+        # Couleurs personnalisées (une par pays), sinon le cycle de couleurs de matplotlib
+        if not colors:
+            cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+            colors = [cycle[i % len(cycle)] for i in range(len(values))]
+        elif len(colors) < len(values):
+            raise ValueError(f"Pas assez de couleurs : {len(colors)} fournie(s) pour {len(values)} pays.")
+        colors = to_rgba_array(list(colors)[:len(values)])
+
+        fig, ax = plt.subplots(figsize=figsize)
+        add_line_collection(ax, years, values, colors=colors)
+        ax.scatter(np.tile(years, len(values)), values.ravel(), marker='x',
+                   c=np.repeat(colors, len(years), axis=0))
+
+        ax.set_title(title if title else indicator_name, fontsize=16)
+        ax.set_xlabel("Année", fontsize=12)
+        ax.set_ylabel(indicator_name, fontsize=12)
+        ax.set_xticks(matrix.index)
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True, linestyle='--', alpha=0.6)
+        fig.tight_layout()
         plt.show()
 
+WDI_MEMBER_PATTERN = re.compile(r"(WDICSV|WDIData)\.csv$", re.IGNORECASE)
+
+
+@instrument
+def read_WDI_archive(archive_path, indicator_codes, countries=None, start=None, end=None, member=None, chunksize=50000):
+    """
+    Lit les indicateurs demandés dans l'archive zip WDI (« bulk download ») sans l'extraire.
+
+    Le fichier de données de l'archive est lu par blocs directement depuis le zip : seules les
+    colonnes d'années demandées sont analysées, et chaque bloc est filtré sur les codes
+    d'indicateurs et de pays avant d'être converti du format large (une colonne par année)
+    au format long `country/date/value` renvoyé par `WorldBankData.get_indicator`.
+
+    Paramètres
+    ----------
+    archive_path : str
+        Chemin de l'archive zip.
+    indicator_codes : list[str]
+        Codes des indicateurs à conserver (par exemple "NY.GDP.MKTP.KD").
+    countries : list[str], optional
+        Codes ISO-3 des pays à conserver. Par défaut tous (agrégats régionaux compris).
+    start, end : int, optional
+        Bornes (incluses) de la période à conserver.
+    member : str, optional
+        Nom du fichier de données dans l'archive. Par défaut, le fichier `WDICSV.csv`
+        (ou `WDIData.csv` pour les anciennes archives).
+    chunksize : int, optional
+        Nombre de lignes lues par bloc.
+
+    Retours
+    -------
+    dict
+        {code indicateur : DataFrame(country, date, value)}, avec `country` le nom du pays
+        (comme dans l'API), trié par pays puis par années décroissantes.
+    """
+
+    indicator_codes = set(indicator_codes)
+    countries = {c.upper() for c in countries} if countries is not None else None
+    parts = {code: [] for code in indicator_codes}
+
+    with zipfile.ZipFile(archive_path) as archive:
+        if member is None:
+            candidates = [name for name in archive.namelist() if WDI_MEMBER_PATTERN.search(name)]
+            if not candidates:
+                raise FileNotFoundError(f"Aucun fichier WDICSV.csv ou WDIData.csv dans {archive_path}.")
+            member = candidates[0]
+
+        with archive.open(member) as f:
+            header = pd.read_csv(f, nrows=0, encoding="utf-8-sig").columns
+        years = [col for col in header if col.strip().isdigit()
+                 and (start is None or int(col) >= start) and (end is None or int(col) <= end)]
+        id_cols = ["Country Name", "Country Code", "Indicator Code"]
+
+        with archive.open(member) as f:
+            reader = pd.read_csv(f, usecols=id_cols + years, chunksize=chunksize, encoding="utf-8-sig",
+                                 dtype={col: "float64" for col in years})
+            for chunk in reader:
+                mask = chunk["Indicator Code"].isin(indicator_codes)
+                if countries is not None:
+                    mask &= chunk["Country Code"].isin(countries)
+                chunk = chunk[mask]
+                if chunk.empty:
+                    continue
+
+                long = chunk.melt(id_vars=id_cols, value_vars=years, var_name="date", value_name="value")
+                for code, group in long.groupby("Indicator Code"):
+                    parts[code].append(group)
+
+    result = {}
+    for code, frames in parts.items():
+        if not frames:
+            continue
+        df = pd.concat(frames, ignore_index=True)
+        df["date"] = df["date"].astype(int)
+        df = df.sort_values(["Country Name", "date"], ascending=[True, False])
+        df = df.rename(columns={"Country Name": "country"})[["country", "date", "value"]]
+        result[code] = df.reset_index(drop=True)
+
+    return result
+
+
+@instrument
 def get_rawlandlockedCountries(url):
     """
     Récupère un tableau Wikipedia contenant les pays et la longueur de leurs côtes.
@@ -126,6 +354,7 @@ def get_rawlandlockedCountries(url):
         url,
         headers={"User-Agent": "Python for data science tutorial"}
         ).content
+    count("bytes_fetched", len(requests_text))
     
     # Récupération des données du tableau depuis la page Wikipédia
     page = bs4.BeautifulSoup(requests_text,"lxml")
@@ -135,6 +364,7 @@ def get_rawlandlockedCountries(url):
     
     return rows
 
+@instrument
 def get_ISOcodes(url):
     """
     Récupère un tableau Wikipedia contenant les pays et leurs codes ISO.
@@ -154,6 +384,7 @@ def get_ISOcodes(url):
     url,
     headers={"User-Agent": "Python for data science tutorial"}
     ).content
+    count("bytes_fetched", len(requests_text))
 
     page = bs4.BeautifulSoup(requests_text, "lxml")
     iso_table= page.find('table')
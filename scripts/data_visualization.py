@@ -5,6 +5,11 @@ import plotly.express as px
 from sklearn.cluster import KMeans
 import plotly.graph_objects as go
 
+from .data_analysis import get_countries_with_missing_values
+from .instrumentation import instrument
+from .plotting import add_line_collection
+
+@instrument
 def plot_missing_values_per_year(data,col,text="PIB Reel"):
     """
     Trace le nombre de valeurs manquantes par année pour une colonne spécifiée dans un ensemble de données.
@@ -41,6 +46,7 @@ def plot_missing_values_per_year(data,col,text="PIB Reel"):
     plt.show()
     
     
+@instrument
 def plot_missing_values_per_country(data,col,treshold,text="PIB Reel"):
     """
     Identifie et visualise les pays ayant un nombre anormal de valeurs manquantes pour une colonne donnée.
@@ -67,10 +73,7 @@ def plot_missing_values_per_country(data,col,treshold,text="PIB Reel"):
         le seuil spécifié.
     """
 
-    subset_data = data.groupby(["country"])[col]
-    missing_values = subset_data.apply(lambda x: x.isna().sum())
-    total_values_per_country = subset_data.apply(lambda x: len(x)).iloc[0]
-    relevant_missing_values = missing_values.loc[missing_values > int(treshold*total_values_per_country)]
+    relevant_missing_values = get_countries_with_missing_values(data, col, treshold)
 
     fig, ax1 = plt.subplots(figsize=(12, 6))
     bars = ax1.bar(relevant_missing_values.index, relevant_missing_values.values, label='Aberrant Country Missing Values')
@@ -86,6 +89,7 @@ def plot_missing_values_per_country(data,col,treshold,text="PIB Reel"):
     
     return relevant_missing_values.index
 
+@instrument
 def plot_world_PIB(PIB_data):
     """
     Trace le PIB total mondial au fil du temps en utilisant les données de PIB fournies.
@@ -114,7 +118,54 @@ def plot_world_PIB(PIB_data):
     plt.ylabel("PIB Mondial")
     plt.show()
 
-def plot_PIB_quantile(PIB_data):
+@instrument
+def compute_PIB_quantiles(PIB_data, q=20, per_year=False, sketches=None):
+    """
+    Calcule l'affectation de chaque observation de PIB à son quantile.
+
+    Pour tracer plusieurs graphiques sur le même panel, calculer le découpage une fois et le
+    passer via le paramètre `quantiles` de `plot_PIB_quantile` et `plot_PIB_top_quantile_countries`
+    évite de relancer `pd.qcut` à chaque figure.
+
+    Paramètres
+    ----------
+    PIB_data : pandas.DataFrame
+        Doit contenir la colonne `PIB` (et `date` si `per_year=True`).
+    q : int, défaut=20
+        Nombre de quantiles.
+    per_year : bool, défaut=False
+        Si True, les quantiles sont calculés année par année plutôt que sur le panel poolé.
+    sketches : data_analysis.QuantileSketches, optionnel
+        Sketches déjà alimentés (par exemple bloc par bloc sur un panel trop grand pour
+        la mémoire). S'ils sont fournis, les bornes des quantiles en sont tirées (découpage
+        approché) ; sinon le découpage est exact (`pd.qcut`, poolé ou année par année).
+
+    Retours
+    -------
+    pandas.Series
+        Le numéro de quantile (0 à q-1) de chaque ligne, aligné sur l'index de `PIB_data`.
+    """
+    if sketches is not None:
+        return sketches.assign_quantiles(PIB_data, 'PIB', q=q, per_year=per_year)
+
+    if not per_year:
+        return pd.qcut(PIB_data['PIB'], q=q, labels=False)
+
+    # Les lignes sans PIB sont écartées : une année entièrement manquante ferait échouer pd.qcut
+    observed = PIB_data.dropna(subset=['PIB'])
+    quantiles = observed.groupby('date')['PIB'].transform(pd.qcut, q=q, labels=False)
+    return quantiles.reindex(PIB_data.index)
+
+
+def _country_year_matrix(data, value_col, index_col='country', date_col='date'):
+    """
+    Pivote un panel long en matrice (entités × années), les cellules absentes valant NaN.
+    """
+    return data.pivot_table(index=index_col, columns=date_col, values=value_col, aggfunc='mean', dropna=False)
+
+
+@instrument
+def plot_PIB_quantile(PIB_data, per_year=False, sketches=None, quantiles=None):
     """
     Trace le PIB moyen par quantiles au fil du temps.
     Cette fonction divise les données de PIB en 20 quantiles et visualise comment le PIB moyen
@@ -125,13 +176,20 @@ def plot_PIB_quantile(PIB_data):
         DataFrame contenant les données de PIB avec les colonnes:
         - 'PIB': Valeurs de PIB à quantifier
         - 'date': Années ou périodes de temps pour l'axe des x
+    :param per_year: bool, défaut=False
+        Si True, les quantiles sont calculés pour chaque année au lieu d'être poolés.
+    :param sketches: data_analysis.QuantileSketches, optionnel
+        Sketches pré-calculés fournissant les bornes des quantiles (voir `compute_PIB_quantiles`).
+    :param quantiles: pandas.Series, optionnel
+        Découpage déjà calculé par `compute_PIB_quantiles(PIB_data, q=20, ...)` ; sinon il est calculé ici.
         
     :return: None
         Affiche une figure matplotlib avec plusieurs lignes de quantiles et une ligne de moyenne globale.
         Chaque quantile est étiqueté sur le côté droit du graphique avec sa couleur de ligne correspondante.
     """
 
-    quantiles = pd.qcut(PIB_data['PIB'], q=20, labels=False)
+    if quantiles is None:
+        quantiles = compute_PIB_quantiles(PIB_data, q=20, per_year=per_year, sketches=sketches)
 
     data = pd.DataFrame({
         'year': PIB_data['date'],
@@ -139,31 +197,37 @@ def plot_PIB_quantile(PIB_data):
         'PIB': PIB_data['PIB']
     })
 
-    grouped_data = data.groupby(['year', 'quantiles'])['PIB'].mean().unstack()
+    grouped_data = data.groupby(['year', 'quantiles'])['PIB'].mean().unstack().reindex(columns=range(20))
     overall_mean = data.groupby('year')['PIB'].mean()
 
-    plt.figure(figsize=(11, 6))
-    for decile in range(20):
-        plt.plot(grouped_data.index, grouped_data[decile], label=f'Quantiles {decile + 1}')
-        plt.text(grouped_data.index[-1] + 2, grouped_data[decile].iloc[-1],
-                f'Quantiles {decile + 1}',
-                va='center', ha='left', color=plt.gca().get_lines()[-1].get_color())
-    plt.plot(overall_mean.index, overall_mean, label='Overall Mean', linestyle='--', color='black')
-    plt.text(overall_mean.index[-1] + 2, overall_mean.iloc[-1] + 13,
+    cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    colors = [cycle[decile % len(cycle)] for decile in range(20)]
+
+    fig, ax = plt.subplots(figsize=(11, 6))
+    add_line_collection(ax, grouped_data.index, grouped_data.to_numpy().T, colors=colors)
+
+    x_label = grouped_data.index[-1] + 2
+    for decile, (y_label, color) in enumerate(zip(grouped_data.iloc[-1].to_numpy(), colors)):
+        ax.text(x_label, y_label, f'Quantiles {decile + 1}', va='center', ha='left', color=color)
+
+    ax.plot(overall_mean.index, overall_mean, label='Overall Mean', linestyle='--', color='black')
+    ax.text(overall_mean.index[-1] + 2, overall_mean.iloc[-1] + 13,
          'Mean',
          va='center', ha='left', color='black')
-    plt.xlabel('Year')
-    plt.ylabel('Average GDP')
-    plt.title('Average GDP by Quantiles Over Time')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('Average GDP')
+    ax.set_title('Average GDP by Quantiles Over Time')
     plt.show()
 
-def plot_PIB_top_quantile_countries(PIB_data, chosen_quantile=19):
+@instrument
+def plot_PIB_top_quantile_countries(PIB_data, chosen_quantile=19, per_year=False, sketches=None, quantiles=None):
     """
     Trace l'évolution temporelle du PIB des pays appartenant à un quantile supérieur donné.
 
     - Découpe la distribution du PIB en 20 quantiles.
     - Filtre les pays du quantile `chosen_quantile`.
-    - Trace la trajectoire PIB(date) pour chaque pays.
+    - Trace la trajectoire PIB(date) pour chaque pays, en reliant les années passées dans le
+      quantile même si le pays en sort entre-temps.
     - Affiche la liste des pays sélectionnés.
 
     Paramètres
@@ -172,34 +236,111 @@ def plot_PIB_top_quantile_countries(PIB_data, chosen_quantile=19):
         Doit contenir : `country`, `date`, `PIB`.
     chosen_quantile : int, défaut=19
         Quantile ciblé (0 = plus bas, 19 = 20ᵉ quantile).
+    per_year : bool, défaut=False
+        Si True, un pays appartient au quantile ciblé année par année (quantiles annuels)
+        plutôt que selon le découpage poolé sur toutes les années.
+    sketches : data_analysis.QuantileSketches, optionnel
+        Sketches pré-calculés fournissant les bornes des quantiles.
+    quantiles : pandas.Series, optionnel
+        Découpage déjà calculé par `compute_PIB_quantiles(PIB_data, q=20, ...)` ; sinon il est calculé ici.
 
     Retour
     ------
     None
     """
-    quantiles = pd.qcut(PIB_data['PIB'], q=20, labels=False)
+    if quantiles is None:
+        quantiles = compute_PIB_quantiles(PIB_data, q=20, per_year=per_year, sketches=sketches)
 
-    data = pd.DataFrame({
-        'country': PIB_data['country'],
-        'year': PIB_data['date'],
-        'quantiles': quantiles,
-        'CG_debt': PIB_data['PIB']
-    })
+    top_decile_data = PIB_data.loc[quantiles == chosen_quantile, ['country', 'date', 'PIB']]
+    matrix = _country_year_matrix(top_decile_data, 'PIB')
+
+    cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    colors = [cycle[i % len(cycle)] for i in range(len(matrix))]
 
-    top_decile_data = data[data['quantiles'] == chosen_quantile]
-    plt.figure(figsize=(12, 6))
-    for country in top_decile_data['country'].unique():
-        country_data = top_decile_data[top_decile_data['country'] == country]
-        plt.plot(country_data['year'], country_data['CG_debt'], label=country)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    add_line_collection(ax, matrix.columns, matrix.to_numpy(), colors=colors, connect_gaps=True)
 
-    plt.xlabel('Year')
-    plt.ylabel('PIB')
-    plt.title(f'Evolution of PIB for Countries in the {chosen_quantile+1}th Decile')
+    ax.set_xlabel('Year')
+    ax.set_ylabel('PIB')
+    ax.set_title(f'Evolution of PIB for Countries in the {chosen_quantile+1}th Decile')
     plt.show()
 
-    print(f'Countries in the {chosen_quantile+1}th-decile: {data[data["quantiles"] == chosen_quantile]["country"].unique()}')
+    print(f'Countries in the {chosen_quantile+1}th-decile: {top_decile_data["country"].unique()}')
+
+
+@instrument
+def ordered_kmeans_clusters(data, col, n_clusters, ascending=True):
+    """
+    Applique K-Means sur une colonne et renumérote les clusters selon leur moyenne.
+
+    Paramètres
+    ----------
+    data : DataFrame
+        Doit contenir la colonne `col`.
+    col : str
+        La variable à segmenter.
+    n_clusters : int
+        Nombre de clusters.
+    ascending : bool, défaut=True
+        Si True, le cluster 0 est celui de plus faible moyenne ; sinon le plus élevé.
+
+    Retour
+    ------
+    Series
+        Le numéro de cluster ordonné de chaque ligne.
+    """
+    labels = pd.Series(KMeans(n_clusters=n_clusters, random_state=42).fit_predict(data[[col]]), index=data.index)
+
+    cluster_order = data[col].groupby(labels).mean().sort_values(ascending=ascending).index
+    mapping = {cluster_order[i]: i for i in range(n_clusters)}
+    return labels.map(mapping)
 
 
+def _ordered_kmeans_kernel(columns, col, n_clusters):
+    return ordered_kmeans_clusters(pd.DataFrame({col: columns[col]}), col, n_clusters).to_numpy()
+
+
+@instrument
+def cluster_per_year(data, col, label, n_clusters, executor=None):
+    """
+    Applique `ordered_kmeans_clusters` séparément pour chaque année.
+
+    Paramètres
+    ----------
+    data : DataFrame
+        Doit contenir : `country`, `date` et `col`.
+    col : str
+        La variable à segmenter.
+    label : str
+        Nom de la colonne de clusters ajoutée.
+    n_clusters : int
+        Nombre de clusters par année.
+    executor : data_analysis.SharedPanelExecutor, optional
+        Si fourni, les K-Means annuels sont exécutés en parallèle sur un pool de processus.
+
+    Retour
+    ------
+    DataFrame
+        Les données concaténées, avec la colonne `label`. Les lignes sans année sont écartées,
+        avec ou sans `executor`.
+    """
+    data = data.dropna(subset=["date"])
+    if executor is not None:
+        clustered = data.copy()
+        clustered[label] = executor.transform(data, "date", [col], _ordered_kmeans_kernel, col=col, n_clusters=n_clusters)
+        return clustered.sort_values("date", kind="stable")
+
+    clustered = []
+
+    for year, group in data.groupby("date"):
+        g = group.copy()
+        g[label] = ordered_kmeans_clusters(g, col, n_clusters)
+        clustered.append(g)
+
+    return pd.concat(clustered)
+
+
+@instrument
 def visualize_economicPower_clusters(weightCountry_data, width=900, height=500):
     """
     Classe les pays en 4 clusters de puissance économique et affiche une carte choroplèthe.
@@ -223,13 +364,7 @@ def visualize_economicPower_clusters(weightCountry_data, width=900, height=500):
         Données avec labels de clusters (`Power`).
     """
     data = weightCountry_data.copy()
-
-    kmeans = KMeans(n_clusters=4, random_state=42)
-    data["Power"] = kmeans.fit_predict(data[["avgWeightCountry"]])
-
-    cluster_order = data.groupby("Power")["avgWeightCountry"].mean().sort_values().index
-    mapping = {cluster_order[i]: i for i in range(4)}
-    data["Power"] = data["Power"].map(mapping)
+    data["Power"] = ordered_kmeans_clusters(data, "avgWeightCountry", n_clusters=4)
 
     fig = px.choropleth(
         data,
@@ -250,6 +385,7 @@ def visualize_economicPower_clusters(weightCountry_data, width=900, height=500):
     return data
 
 
+@instrument
 def visualize_trade_clusters(netExportators_data, width=900, height=500):
     """
     Affiche une carte mondiale de classification binaire des pays exportateurs nets.
@@ -285,6 +421,7 @@ def visualize_trade_clusters(netExportators_data, width=900, height=500):
     fig.show()
 
 
+@instrument
 def visualize_landlocked_countries(landlocked_data, width=900, height=500):
     """
     Génère une carte mondiale indiquant si un pays est enclavé ou non.
@@ -320,6 +457,7 @@ def visualize_landlocked_countries(landlocked_data, width=900, height=500):
     fig.show()
 
 
+@instrument
 def visualize_HDI_clusters(HDI_data, width=900, height=500):
     """
     Segmente les pays en 3 clusters selon leur IDH et affiche une carte choroplèthe.
@@ -368,7 +506,8 @@ def visualize_HDI_clusters(HDI_data, width=900, height=500):
     fig.show()
 
 
-def animated_economicPower_map(weightCountry_data, width=900, height=500):
+@instrument
+def animated_economicPower_map(weightCountry_data, width=900, height=500, executor=None):
     """
     Produit une carte mondiale animée montrant l'évolution des clusters de puissance économique.
 
@@ -384,26 +523,14 @@ def animated_economicPower_map(weightCountry_data, width=900, height=500):
         Largeur de la carte.
     height : int, défaut=500
         Hauteur de la carte.
+    executor : data_analysis.SharedPanelExecutor, optional
+        Si fourni, les K-Means annuels sont exécutés en parallèle (voir `cluster_per_year`).
 
     Retour
     ------
     None
     """
-    data = weightCountry_data.copy()
-    clustered = []
-
-    for year, group in data.groupby("date"):
-        kmeans = KMeans(n_clusters=4, random_state=42)
-        g = group.copy()
-        g["Power"] = kmeans.fit_predict(g[["weightCountry"]])
-
-        order = g.groupby("Power")["weightCountry"].mean().sort_values().index
-        mapping = {order[i]: i for i in range(4)}
-        g["Power"] = g["Power"].map(mapping)
-
-        clustered.append(g)
-
-    df_clustered = pd.concat(clustered)
+    df_clustered = cluster_per_year(weightCountry_data, "weightCountry", "Power", n_clusters=4, executor=executor)
 
     fig = px.choropleth(
         df_clustered,
@@ -425,7 +552,8 @@ def animated_economicPower_map(weightCountry_data, width=900, height=500):
     fig.show()
 
 
-def animated_HDI_map(HDI_data, width=900, height=500):
+@instrument
+def animated_HDI_map(HDI_data, width=900, height=500, executor=None):
     """
     Génère une carte mondiale animée montrant l'évolution des clusters IDH dans le temps.
 
@@ -437,25 +565,14 @@ def animated_HDI_map(HDI_data, width=900, height=500):
         Largeur de la carte.
     height : int, défaut=500
         Hauteur de la carte.
+    executor : data_analysis.SharedPanelExecutor, optional
+        Si fourni, les K-Means annuels sont exécutés en parallèle (voir `cluster_per_year`).
 
     Retour
     ------
     None
     """
-    clustered = []
-
-    for year, group in HDI_data.groupby("date"):
-        kmeans = KMeans(n_clusters=3, random_state=42)
-        g = group.copy()
-        g["Scale"] = kmeans.fit_predict(g[["HDI"]])
-
-        order = g.groupby("Scale")["HDI"].mean().sort_values().index
-        mapping = {order[i]: i for i in range(3)}
-        g["Scale"] = g["Scale"].map(mapping)
-
-        clustered.append(g)
-
-    df_clustered = pd.concat(clustered)
+    df_clustered = cluster_per_year(HDI_data, "HDI", "Scale", n_clusters=3, executor=executor)
 
     fig = px.choropleth(
         df_clustered,
@@ -477,6 +594,7 @@ def animated_HDI_map(HDI_data, width=900, height=500):
 
     
 
+@instrument
 def plot_world_map(dataframe, y_col, data_name, width=900, height=500):
     """
     Crée une carte mondiale animée montrant la distribution d'une colonne de données spécifique
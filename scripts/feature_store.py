@@ -0,0 +1,296 @@
+import functools
+import hashlib
+import os
+import re
+import types
+
+import numpy as np
+import pandas as pd
+
+from .instrumentation import count, instrument
+
+_SIMPLE_TYPES = (type(None), bool, int, float, complex, str, bytes, np.generic)
+
+
+def _stable_repr(value):
+    """
+    Représentation stable d'une constante (scalaire, chaîne, objet code ou conteneur de
+    ceux-ci) ; None si la valeur n'en a pas (DataFrame, tableau, objet quelconque).
+    """
+    if isinstance(value, _SIMPLE_TYPES):
+        return f"{type(value).__name__}:{value!r}"
+    if isinstance(value, types.CodeType):
+        return _code_digest(value)
+    if isinstance(value, (tuple, list, frozenset, set)):
+        items = [_stable_repr(v) for v in (sorted(value, key=repr) if isinstance(value, (set, frozenset)) else value)]
+        return None if None in items else f"{type(value).__name__}({','.join(items)})"
+    if isinstance(value, dict):
+        items = [(_stable_repr(k), _stable_repr(v)) for k, v in value.items()]
+        return None if any(None in kv for kv in items) else f"dict({sorted(items)})"
+    return None
+
+
+def _code_digest(code):
+    """
+    Empreinte d'un objet code : bytecode, constantes (codes imbriqués compris) et noms utilisés.
+    """
+    parts = [code.co_code.hex(), repr(code.co_names)] + [_stable_repr(c) or repr(type(c)) for c in code.co_consts]
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+def _callable_identity(func):
+    """
+    Identité d'une fonction de calcul pour l'empreinte du cache : nom qualifié, code (constantes
+    et fonctions imbriquées comprises), valeurs par défaut et contenu des fermetures. Renvoie None
+    si elle dépend de valeurs sans représentation stable (DataFrame capturé, objet appelable...).
+    """
+    if isinstance(func, functools.partial):
+        inner = _callable_identity(func.func)
+        extra = _stable_repr((func.args, func.keywords))
+        return None if inner is None or extra is None else f"partial({inner},{extra})"
+
+    code = getattr(func, "__code__", None)
+    if code is None or getattr(func, "__self__", None) is not None:
+        return None
+    closure = tuple(cell.cell_contents for cell in func.__closure__ or ())
+    captured = [_stable_repr(v) for v in (func.__defaults__ or (), func.__kwdefaults__ or {}, closure)]
+    if None in captured:
+        return None
+    return "\n".join([f"{func.__module__}.{func.__qualname__}", _code_digest(code)] + captured)
+
+
+class FeatureStore:
+    """
+    Magasin de variables par pays, indexé par une liste fixe de codes ISO-3.
+
+    Chaque variable (IDH moyen, temps de réponse, enclavement, exportateur net, poids
+    économique...) est alignée une seule fois sur l'index et stockée comme une colonne
+    d'une matrice de valeurs, avec un masque de validité. Assembler une matrice de
+    régression revient ensuite à extraire des colonnes et à combiner leurs masques,
+    sans fusion par clé : ajouter une variable ne coûte plus une fusion de plus.
+
+    Les variables calculées via `feature` peuvent être mises en cache sur disque : un fichier
+    .npz par variable, invalidé si l'index, la fonction de calcul ou la `version` des données
+    change. Les variables entières ou booléennes (indicatrices) gardent leur type dans
+    `design_matrix`.
+
+    Exemple
+    -------
+    >>> store = FeatureStore(codesISO_data["ISO-3"], cache_dir="cache/features")
+    >>> store.add_frame(aggregated_HDI)            # colonnes country, HDI_mean
+    >>> store.add_frame(responseTime_data)
+    >>> store.feature("isLandlocked", lambda: validLandlockedData, version="coastline-2024")
+    >>> merged_data = store.design_matrix(["HDI_mean", "avgResponseTime", "isLandlocked"])
+    """
+
+    def __init__(self, index, cache_dir=None, capacity=16):
+        self.index = pd.Index(np.unique(np.asarray(index, dtype=str)), name="country")
+        self.cache_dir = cache_dir
+        self.names = []
+        self._positions = {}
+        self._values = np.full((len(self.index), capacity), np.nan)
+        self._valid = np.zeros((len(self.index), capacity), dtype=bool)
+        self._dtypes = {}  # {variable : type d'origine}, pour les variables entières ou booléennes
+        self._index_hash = hashlib.sha1("\n".join(self.index).encode()).hexdigest()
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def _slot(self, name):
+        if name in self._positions:
+            return self._positions[name]
+
+        if len(self.names) == self._values.shape[1]:
+            grow = self._values.shape[1]
+            self._values = np.hstack([self._values, np.full((len(self.index), grow), np.nan)])
+            self._valid = np.hstack([self._valid, np.zeros((len(self.index), grow), dtype=bool)])
+
+        self._positions[name] = len(self.names)
+        self.names.append(name)
+        return self._positions[name]
+
+    def _store(self, name, values, valid, dtype=None):
+        slot = self._slot(name)
+        self._values[:, slot] = values
+        self._valid[:, slot] = valid
+        if dtype is not None and (np.issubdtype(dtype, np.integer) or np.issubdtype(dtype, np.bool_)):
+            self._dtypes[name] = np.dtype(dtype)
+        else:
+            self._dtypes.pop(name, None)
+
+    @instrument
+    def add(self, name, data, key="country"):
+        """
+        Aligne une variable sur l'index et l'enregistre sous le nom `name`.
+
+        Paramètres
+        ----------
+        name : str
+            Nom de la variable.
+        data : pandas.Series ou pandas.DataFrame
+            Une Series indexée par code ISO-3, ou un DataFrame contenant `key` et la colonne `name`.
+            Les codes absents de l'index sont ignorés.
+        key : str, optional
+            Colonne des codes ISO-3 lorsque `data` est un DataFrame. Par défaut "country".
+        """
+        if isinstance(data, pd.DataFrame):
+            data = data.set_index(key)[name]
+        if data.index.has_duplicates:
+            raise ValueError(f"Plusieurs valeurs par pays pour {name}.")
+
+        data = pd.to_numeric(data)
+        positions = self.index.get_indexer(data.index.astype(str))
+        found = positions >= 0
+        values = np.full(len(self.index), np.nan)
+        values[positions[found]] = data.to_numpy(dtype=float)[found]
+
+        self._store(name, values, ~np.isnan(values), dtype=data.dtype)
+        return self
+
+    def add_frame(self, data, key="country"):
+        """
+        Enregistre toutes les colonnes de `data` autres que `key`.
+        """
+        for name in data.columns.drop(key):
+            self.add(name, data[[key, name]], key=key)
+        return self
+
+    def _cache_path(self, name):
+        # Le nom n'est pas un chemin : on ne garde que des caractères sûrs, et l'empreinte du nom
+        # distingue les noms que ce nettoyage confondrait ("a/b" et "a_b")
+        safe = re.sub(r"[^A-Za-z0-9_-]", "_", name)[:64]
+        return os.path.join(self.cache_dir, f"{safe}-{hashlib.sha1(name.encode()).hexdigest()[:12]}.npz")
+
+    def _fingerprint(self, name, compute, version):
+        """
+        Empreinte d'une variable en cache : index, nom, identité de la fonction de calcul (voir
+        `_callable_identity`) et version des données.
+        """
+        identity = _callable_identity(compute)
+        if identity is None and version is None:
+            raise ValueError(
+                f"Impossible d'identifier la fonction de calcul de {name!r} (fermeture ou valeur par défaut "
+                f"non scalaire, objet appelable...) : passez `version` pour utiliser le cache."
+            )
+        parts = [self._index_hash, name, identity or "", repr(version)]
+        return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+    @instrument
+    def feature(self, name, compute, key="country", version=None):
+        """
+        Renvoie la variable `name` (valeurs alignées sur l'index) en la calculant au besoin.
+
+        Si la variable n'est pas encore enregistrée, on la lit dans le cache disque lorsqu'il
+        existe avec la même empreinte ; sinon on appelle `compute()` (qui renvoie un DataFrame ou
+        une Series, voir `add`), on l'enregistre et on écrit le cache.
+
+        Paramètres
+        ----------
+        name : str
+            Nom de la variable.
+        compute : callable
+            Fonction sans argument qui calcule la variable. Son code (constantes comprises), ses
+            valeurs par défaut et les scalaires qu'elle capture entrent dans l'empreinte du cache.
+        key : str, optional
+            Colonne des codes ISO-3 du DataFrame renvoyé. Par défaut "country".
+        version : optional
+            Version des données d'entrée (millésime, date du fichier source, empreinte du
+            DataFrame...). Le cache ne peut pas voir les données sans appeler `compute` (variables
+            globales, fichiers, DataFrame capturé) : il faut changer `version` quand elles
+            changent pour invalider l'entrée. Obligatoire avec un cache disque si `compute`
+            capture des valeurs non scalaires ou n'est pas une fonction.
+
+        Exceptions
+        ----------
+        ValueError
+            Si le cache disque est actif, que `version` vaut None et que `compute` n'a pas
+            d'identité stable.
+        """
+        if name not in self._positions:
+            path = self._cache_path(name) if self.cache_dir else None
+            fingerprint = self._fingerprint(name, compute, version) if path else None
+
+            hit = False
+            if path and os.path.exists(path):
+                with np.load(path) as cached:
+                    if str(cached["fingerprint"]) == fingerprint:
+                        hit = True
+                        dtype = str(cached["dtype"])
+                        self._store(name, cached["values"], cached["valid"], dtype=np.dtype(dtype) if dtype else None)
+
+            if hit:
+                count("cache_hit:feature_store")
+            else:
+                count("cache_miss:feature_store")
+                self.add(name, compute(), key=key)
+                if path:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    slot = self._positions[name]
+                    dtype = self._dtypes.get(name)
+                    np.savez(path, values=self._values[:, slot], valid=self._valid[:, slot],
+                             dtype=dtype.str if dtype is not None else "", fingerprint=fingerprint)
+
+        return pd.Series(self._values[:, self._positions[name]], index=self.index, name=name)
+
+    @instrument
+    def design_matrix(self, features, dropna=True):
+        """
+        Assemble les variables demandées en un DataFrame par pays.
+
+        Paramètres
+        ----------
+        features : list[str]
+            Les variables à extraire.
+        dropna : bool, optional
+            Si True (par défaut), ne garde que les pays pour lesquels toutes les variables sont renseignées.
+
+        Retours
+        -------
+        pandas.DataFrame
+            Colonnes `country` puis `features`, dans l'ordre des codes ISO-3.
+        """
+        missing = [name for name in features if name not in self._positions]
+        if missing:
+            raise KeyError(f"Variables inconnues : {missing}. Utilisez add() ou feature() d'abord.")
+
+        slots = [self._positions[name] for name in features]
+        values = self._values[:, slots]
+        rows = self._valid[:, slots].all(axis=1) if dropna else np.ones(len(self.index), dtype=bool)
+
+        data = pd.DataFrame(values[rows], columns=features)
+        for name in features:
+            if name in self._dtypes:
+                data[name] = self._restore_dtype(data[name], self._dtypes[name])
+        data.insert(0, "country", self.index[rows])
+        return data
+
+    @staticmethod
+    def _restore_dtype(column, dtype):
+        """
+        Redonne son type d'origine à une variable entière ou booléenne ; le type pandas
+        correspondant acceptant les manquants ("Int64", "boolean") est utilisé s'il en reste.
+        """
+        if not column.isna().any():
+            return column.astype(dtype)
+        return column.astype("boolean" if dtype == np.bool_ else dtype.name.capitalize())
+
+    def save(self, path):
+        """
+        Enregistre l'ensemble du magasin (index, noms, valeurs, validité) dans un fichier .npz.
+        """
+        n = len(self.names)
+        dtypes = [self._dtypes[name].str if name in self._dtypes else "" for name in self.names]
+        np.savez(path, index=np.asarray(self.index, dtype=str), names=np.asarray(self.names, dtype=str),
+                 dtypes=np.asarray(dtypes, dtype=str), values=self._values[:, :n], valid=self._valid[:, :n])
+
+    @classmethod
+    def load(cls, path, cache_dir=None):
+        """
+        Recharge un magasin enregistré par `save`.
+        """
+        with np.load(path) as saved:
+            store = cls(saved["index"], cache_dir=cache_dir, capacity=max(1, len(saved["names"])))
+            for i, (name, dtype) in enumerate(zip(saved["names"], saved["dtypes"])):
+                store._store(str(name), saved["values"][:, i], saved["valid"][:, i],
+                             dtype=np.dtype(str(dtype)) if str(dtype) else None)
+        return store
@@ -0,0 +1,274 @@
+"""
+Instrumentation optionnelle des fonctions de `scripts/`.
+
+Désactivée par défaut : chaque fonction décorée par `instrument` ne fait alors qu'un test
+booléen avant d'appeler la fonction d'origine. Une fois activée (`enable()`, le contexte
+`profile()` ou la variable d'environnement SCRIPTS_PROFILE=1), chaque appel enregistre :
+
+- son temps d'horloge ;
+- le nombre de lignes en entrée (premier argument tabulaire) et en sortie ;
+- le pic mémoire atteint pendant l'appel (si `track_memory=True`, via tracemalloc ; voir
+  `enable` pour la limite aux appels d'un seul thread) ;
+- les compteurs incrémentés pendant l'appel (octets téléchargés, succès et échecs de cache...).
+
+Les événements s'exportent en JSON (`dump_json`) ou au format Chrome trace (`dump_trace`,
+lisible dans chrome://tracing ou Perfetto).
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+import pandas as pd
+
+
+class _State:
+    def __init__(self):
+        self.enabled = False
+        self.track_memory = False
+        self.memory_thread = None
+        self.started_tracemalloc = False
+        self.events = []
+        self.counters = defaultdict(int)
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def stack(self):
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+
+_state = _State()
+
+
+def enable(track_memory=False):
+    """
+    Active l'instrumentation. `track_memory=True` démarre tracemalloc pour mesurer les pics
+    mémoire, ce qui ralentit sensiblement l'exécution.
+
+    Le pic de tracemalloc est global au processus : seuls les appels du thread qui active
+    l'instrumentation reçoivent un `peak_bytes`. Les appels exécutés dans d'autres threads (par
+    exemple la collecte parallèle) ne sont pas mesurés, pour ne pas remettre à zéro le pic d'un
+    appel concurrent ; leurs allocations restent comptées dans le pic de l'appel englobant.
+    """
+    _state.enabled = True
+    _state.track_memory = track_memory
+    _state.memory_thread = threading.get_ident()
+    if track_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _state.started_tracemalloc = True
+
+
+def disable():
+    """
+    Désactive l'instrumentation (les événements déjà enregistrés sont conservés). tracemalloc
+    n'est arrêté que s'il a été démarré par `enable` : un traçage lancé avant (par l'utilisateur,
+    pytest...) continue.
+    """
+    _state.enabled = False
+    if _state.started_tracemalloc and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _state.started_tracemalloc = False
+    _state.track_memory = False
+
+
+def is_enabled():
+    return _state.enabled
+
+
+def reset():
+    """
+    Efface les événements et compteurs enregistrés.
+    """
+    with _state.lock:
+        _state.events = []
+        _state.counters = defaultdict(int)
+        _state.origin = time.perf_counter()
+
+
+@contextlib.contextmanager
+def profile(track_memory=False):
+    """
+    Contexte qui active l'instrumentation, puis la désactive en sortie.
+
+    Exemple
+    -------
+    >>> with profile() as events:
+    ...     run_pipeline(offline=True)
+    >>> dump_trace("trace.json")
+    """
+    reset()
+    enable(track_memory=track_memory)
+    try:
+        yield _state.events
+    finally:
+        disable()
+
+
+def count(name, n=1):
+    """
+    Incrémente un compteur (par exemple 'bytes_fetched' ou 'cache_hit:feature_store'),
+    globalement et pour l'appel instrumenté en cours. Sans effet si l'instrumentation est désactivée.
+    """
+    if not _state.enabled:
+        return
+    with _state.lock:
+        _state.counters[name] += n
+    stack = _state.stack()
+    if stack:
+        stack[-1]["counters"][name] = stack[-1]["counters"].get(name, 0) + n
+
+
+def _rows(obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series, list)):
+        return len(obj)
+    if isinstance(obj, tuple):
+        rows = [r for r in map(_rows, obj) if r is not None]
+        return sum(rows) if rows else None
+    return None
+
+
+def _first_rows(args, kwargs):
+    for value in list(args) + list(kwargs.values()):
+        rows = _rows(value)
+        if rows is not None:
+            return rows
+    return None
+
+
+def instrument(func):
+    """
+    Décorateur qui enregistre un événement par appel lorsque l'instrumentation est active.
+
+    Le pic mémoire (`peak_bytes`) n'est mesuré que pour les appels du thread qui a appelé
+    `enable`. Les étapes exécutées par un pool sont donc sous-estimées : les appels faits dans
+    des threads de travail n'ont pas de `peak_bytes` (leurs allocations ne comptent que dans le
+    pic de l'appel englobant, s'il chevauche), et les allocations faites dans des processus de
+    travail (`SharedPanelExecutor`) ne sont vues nulle part.
+    """
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _state.enabled:
+            return func(*args, **kwargs)
+
+        stack = _state.stack()
+        track_memory = (_state.track_memory and tracemalloc.is_tracing()
+                        and threading.get_ident() == _state.memory_thread)
+        event = {
+            "name": name,
+            "thread": threading.get_ident(),
+            "rows_in": _first_rows(args, kwargs),
+            "counters": {},
+        }
+        if track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]["_peak"] = max(stack[-1]["_peak"], peak)
+            tracemalloc.reset_peak()
+            event["_start_memory"] = current
+            event["_peak"] = current
+
+        stack.append(event)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            event["rows_out"] = _rows(result)
+            return result
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            event["start"] = start - _state.origin
+            event["seconds"] = end - start
+            if track_memory:
+                peak = max(event.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                event["peak_bytes"] = peak - event.pop("_start_memory")
+                if stack:
+                    stack[-1]["_peak"] = max(stack[-1]["_peak"], peak)
+            with _state.lock:
+                _state.events.append(event)
+
+    return wrapper
+
+
+def events():
+    return list(_state.events)
+
+
+def counters():
+    return dict(_state.counters)
+
+
+def summary():
+    """
+    Agrège les événements par fonction : nombre d'appels, temps total et maximal, lignes, pic mémoire.
+
+    Retours
+    -------
+    pandas.DataFrame
+        Une ligne par fonction, triée par temps total décroissant.
+    """
+    columns = ["name", "calls", "total_seconds", "max_seconds", "rows_in", "rows_out", "peak_bytes"]
+    if not _state.events:
+        return pd.DataFrame(columns=columns)
+
+    data = pd.DataFrame(_state.events)
+    for col in ("rows_in", "rows_out", "peak_bytes"):
+        if col not in data:
+            data[col] = None
+
+    def total(values):
+        return pd.to_numeric(values).sum(min_count=1)
+
+    agg = data.groupby("name").agg(
+        calls=("seconds", "size"),
+        total_seconds=("seconds", "sum"),
+        max_seconds=("seconds", "max"),
+        rows_in=("rows_in", total),
+        rows_out=("rows_out", total),
+        peak_bytes=("peak_bytes", lambda values: pd.to_numeric(values).max()),
+    )
+    return agg.sort_values("total_seconds", ascending=False).reset_index()[columns]
+
+
+def dump_json(path):
+    """
+    Écrit les événements et les compteurs globaux dans un fichier JSON.
+    """
+    with open(path, "w") as f:
+        json.dump({"events": events(), "counters": counters()}, f, indent=2, default=str)
+
+
+def dump_trace(path):
+    """
+    Écrit les événements au format Chrome trace (événements complets 'X', en microsecondes).
+    """
+    pid = os.getpid()
+    trace_events = [
+        {
+            "name": event["name"],
+            "ph": "X",
+            "ts": event["start"] * 1e6,
+            "dur": event["seconds"] * 1e6,
+            "pid": pid,
+            "tid": event["thread"],
+            "args": {k: v for k, v in event.items() if k not in ("name", "start", "seconds", "thread")},
+        }
+        for event in events()
+    ]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": trace_events, "otherData": counters()}, f, default=str)
+
+
+# SCRIPTS_PROFILE=1 (ou true, yes, on) active l'instrumentation, SCRIPTS_PROFILE=memory y ajoute la mémoire
+_PROFILE_VALUES = {"1", "true", "yes", "on", "memory"}
+_profile = os.environ.get("SCRIPTS_PROFILE", "").strip().lower()
+if _profile in _PROFILE_VALUES:
+    enable(track_memory=_profile == "memory")
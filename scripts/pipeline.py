@@ -0,0 +1,299 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import data_analysis as da
+from . import data_cleaner as dcl
+from . import data_collector as dc
+from . import regression as rg
+from .feature_store import FeatureStore
+from .instrumentation import instrument
+
+
+LANDLOCKED_URL = "https://en.wikipedia.org/wiki/List_of_countries_by_length_of_coastline"
+ISO_URL = "https://en.wikipedia.org/wiki/List_of_ISO_3166_country_codes"
+
+ISO_BACKUP_PATH = "data/ISO_data.csv"
+LANDLOCKED_BACKUP_PATH = "data/landlocked_data.csv"
+HDI_PATH = "data/hdi-data.xlsx"
+
+REGRESSION_X_COLS = ['HDI_mean', 'isLandlocked', 'netExportateur', 'avgWeightCountry']
+REGRESSION_Y_COL = 'avgResponseTime'
+
+
+class StageTimer:
+    """
+    Mesure le temps d'horloge de chaque étape du pipeline.
+    Les étapes exécutées en parallèle sont chronométrées chacune de leur côté.
+    """
+
+    def __init__(self, verbose=True):
+        self.timings = {}
+        self.verbose = verbose
+
+    def run(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            if self.verbose:
+                print(f"[{name}] {self.timings[name]:.2f}s")
+
+    def report(self):
+        width = max(len(name) for name in self.timings)
+        lines = [f"{name:<{width}}  {seconds:8.2f}s" for name, seconds in self.timings.items()]
+        return "\n".join(lines)
+
+
+def _read_backup(path):
+    data = pd.read_csv(path)
+    return data.drop(columns=['Unnamed: 0'])
+
+
+@instrument
+def collect_ISOcodes(offline=False):
+    """
+    Récupère et nettoie la table des codes ISO, avec repli sur la copie locale.
+    """
+    if offline:
+        return _read_backup(ISO_BACKUP_PATH)
+    try:
+        return dcl.clean_ISOData(dc.get_ISOcodes(ISO_URL))
+    except Exception as e:
+        print(f"An error occurred while fetching or cleaning ISO codes data: {e}")
+        return _read_backup(ISO_BACKUP_PATH)
+
+
+@instrument
+def collect_landlocked(offline=False):
+    """
+    Récupère et nettoie la table des longueurs de côtes, avec repli sur la copie locale.
+    """
+    if offline:
+        return _read_backup(LANDLOCKED_BACKUP_PATH)
+    try:
+        return dcl.clean_landlockedData(dc.get_rawlandlockedCountries(LANDLOCKED_URL))
+    except Exception as e:
+        print(f"An error occurred while fetching or cleaning landlocked data: {e}")
+        return _read_backup(LANDLOCKED_BACKUP_PATH)
+
+
+@instrument
+def collect_indicator(worldBank, indicator_name, countries, start, end, offline=False):
+    """
+    Récupère un indicateur World Bank (ou sa copie locale en mode hors ligne).
+    """
+    if offline:
+        return worldBank.load_backup(indicator_name)
+    return worldBank.get_indicator(indicator_name, countries, start=start, end=end)
+
+
+@instrument
+def collect(timer, start=1990, end=2024, offline=False, hdi_path=HDI_PATH, workers=6,
+            base_url=dc.WorldBankData.BASE_URL):
+    """
+    Étape de collecte : les sources indépendantes sont récupérées en parallèle.
+
+    Les codes ISO, les côtes et l'IDH sont lancés simultanément ; les trois indicateurs
+    World Bank démarrent dès que la liste des codes ISO est disponible.
+
+    Retours
+    -------
+    dict
+        Les DataFrames bruts : 'ISO', 'landlocked', 'HDI' et un par indicateur World Bank.
+    """
+    worldBank = dc.WorldBankData(base_url=base_url)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            "ISO": pool.submit(timer.run, "collect:ISO", collect_ISOcodes, offline),
+            "landlocked": pool.submit(timer.run, "collect:landlocked", collect_landlocked, offline),
+            "HDI": pool.submit(timer.run, "collect:HDI", pd.read_excel, hdi_path),
+        }
+
+        countries = futures["ISO"].result()["ISO-3"].tolist()
+        for name in worldBank.INDICATEURS:
+            futures[name] = pool.submit(
+                timer.run, f"collect:{name}", collect_indicator, worldBank, name, countries, start, end, offline
+            )
+
+        return {name: future.result() for name, future in futures.items()}
+
+
+@instrument
+def match(raw):
+    """
+    Étape de rapprochement : remplace les noms de pays par leurs codes ISO-3.
+    """
+    matchingDictionnary = dcl.build_ISOMatchingDictionnary(raw["PIB"]["country"].unique(), raw["ISO"])
+
+    for name in dc.WorldBankData.INDICATEURS:
+        raw[name] = dcl.apply_ISOMatching(raw[name], matchingDictionnary)
+
+    landlocked = dcl.apply_ISOMatching(raw["landlocked"], matchingDictionnary)
+    raw["landlocked"] = dcl.apply_ISOMatching(landlocked, dcl.LANDLOCKED_ISO_MATCHES)
+
+    return raw
+
+
+@instrument
+def clean(raw, missing_treshold=0.1):
+    """
+    Étape de nettoyage : retire les pays trop lacunaires, nettoie l'IDH et les côtes.
+    """
+    for name in dc.WorldBankData.INDICATEURS:
+        data = raw[name]
+        countries_toRemove = da.get_countries_with_missing_values(data, name, missing_treshold).index
+        raw[name] = data[~data["country"].isin(countries_toRemove)].reset_index(drop=True)
+
+    # raw["HDI"] reste un DataFrame (nettoyé) ; l'analyseur est rangé à part pour l'agrégation
+    hdiAnalyzer = da.HDIDataAnalyzer(HDI_data=raw["HDI"])
+    raw["HDI"] = hdiAnalyzer.clean_data()
+    raw["HDI_analyzer"] = hdiAnalyzer
+
+    landlocked = raw["landlocked"].copy()
+    landlocked['isLandlocked'] = (landlocked['Coastline'] == 0).astype(int)
+    raw["landlocked"] = landlocked.drop(columns=['Coastline'])
+
+    return raw
+
+
+@instrument
+def impute(raw, executor=None):
+    """
+    Étape d'imputation : moyenne par pays pour le PIB, remplissage arrière puis avant pour le commerce.
+    """
+    raw["PIB"] = da.impute_missing_values(raw["PIB"], "PIB", method="mean", executor=executor)
+    for name in ("Importations", "Exportations"):
+        raw[name] = da.impute_missing_values(raw[name], name, method="backward_fill", executor=executor)
+        raw[name] = da.impute_missing_values(raw[name], name, method="forward_fill", executor=executor)
+    return raw
+
+
+@instrument
+def build_features(raw):
+    """
+    Calcule les variables explicatives agrégées par pays.
+    """
+    _, weightCountry = da.compute_weightCountry(raw["PIB"])
+
+    trade_data = pd.merge(raw["Importations"], raw["Exportations"], on=['country', 'date'])
+    trade_analyzer = da.TradeDataAnalyzer(trade_data=trade_data)
+    trade_analyzer.get_balance()
+    netExportators = trade_analyzer.classify_exporters(threshold=0)
+
+    return {
+        "aggregated_HDI": raw["HDI_analyzer"].aggregated_HDI(),
+        "weightCountry": weightCountry,
+        "netExportators": netExportators,
+        "landlocked": raw["landlocked"],
+    }
+
+
+MERGED_COLUMNS = ['HDI_mean', 'avgResponseTime', 'isLandlocked', 'netExportateur', 'avgWeightCountry']
+
+
+@instrument
+def merge(features, responseTime_data, index):
+    """
+    Étape de fusion : aligne les variables par pays sur l'index ISO-3 (`FeatureStore`)
+    et ne garde que les pays pour lesquels elles sont toutes renseignées.
+    """
+    store = FeatureStore(index)
+    store.add_frame(features["aggregated_HDI"])
+    store.add_frame(responseTime_data)
+    store.add_frame(features["landlocked"])
+    store.add_frame(features["netExportators"])
+    store.add_frame(features["weightCountry"])
+    return store.design_matrix(MERGED_COLUMNS)
+
+
+@instrument
+def export(output_dir, merged_data, responseTime_data, features, model, timer):
+    """
+    Étape d'export : écrit les tables, le résumé de la régression et les temps par étape.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    merged_data.to_csv(os.path.join(output_dir, "merged_data.csv"), index=False)
+    responseTime_data.to_csv(os.path.join(output_dir, "responseTime_data.csv"), index=False)
+    features["weightCountry"].to_csv(os.path.join(output_dir, "weightCountry.csv"), index=False)
+    with open(os.path.join(output_dir, "regression_summary.txt"), "w") as f:
+        f.write(model.summary().as_text())
+    with open(os.path.join(output_dir, "timings.json"), "w") as f:
+        json.dump(timer.timings, f, indent=2)
+
+
+@instrument
+def run_pipeline(start=1990, end=2024, offline=False, output_dir="output", hdi_path=HDI_PATH,
+                 missing_treshold=0.1, workers=6, base_url=dc.WorldBankData.BASE_URL, processes=None,
+                 verbose=True):
+    """
+    Exécute l'analyse complète sans interface : collecte, rapprochement, nettoyage, imputation,
+    temps de réponse, fusion, régression et export.
+
+    Paramètres
+    ----------
+    start, end : int
+        Période demandée à l'API World Bank.
+    offline : bool, défaut=False
+        Si True, n'utilise que les copies locales du dossier `data/`.
+    output_dir : str
+        Dossier dans lequel les résultats sont exportés.
+    hdi_path : str
+        Chemin du fichier Excel de l'IDH.
+    missing_treshold : float, défaut=0.1
+        Proportion de valeurs manquantes au-delà de laquelle un pays est retiré.
+    workers : int, défaut=6
+        Nombre de sources collectées simultanément.
+    base_url : str
+        Racine de l'API World Bank (par exemple un serveur local de `benchmarks/worldbank_server.py`).
+    processes : int, optional
+        Si fourni, l'imputation et les temps de réponse sont calculés pays par pays sur un pool
+        de `processes` processus (`data_analysis.SharedPanelExecutor`).
+    verbose : bool, défaut=True
+        Affiche le temps de chaque étape au fil de l'eau.
+
+    Retours
+    -------
+    dict
+        Les tables finales ('merged_data', 'responseTime_data'), le modèle ajusté ('model')
+        et les temps par étape ('timings', en secondes).
+    """
+    timer = StageTimer(verbose=verbose)
+    pipeline_start = time.perf_counter()
+
+    raw = timer.run("collect", collect, timer, start=start, end=end, offline=offline,
+                    hdi_path=hdi_path, workers=workers, base_url=base_url)
+    raw = timer.run("match", match, raw)
+    raw = timer.run("clean", clean, raw, missing_treshold=missing_treshold)
+    executor = da.SharedPanelExecutor(max_workers=processes) if processes else None
+    try:
+        raw = timer.run("impute", impute, raw, executor=executor)
+        responseTime_data = timer.run("response_times", da.compute_response_times, raw["PIB"], executor=executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    responseTime_data = responseTime_data.dropna().reset_index(drop=True)
+
+    features = timer.run("features", build_features, raw)
+    merged_data = timer.run("merge", merge, features, responseTime_data, raw["ISO"]["ISO-3"])
+    model = timer.run("regress", rg.perform_regression, merged_data, REGRESSION_X_COLS, REGRESSION_Y_COL,
+                      method='HC3')
+
+    timer.timings["total"] = time.perf_counter() - pipeline_start
+    timer.run("export", export, output_dir, merged_data, responseTime_data, features, model, timer)
+
+    if verbose:
+        print(timer.report())
+
+    return {
+        "merged_data": merged_data,
+        "responseTime_data": responseTime_data,
+        "model": model,
+        "timings": timer.timings,
+    }
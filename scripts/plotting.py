@@ -0,0 +1,36 @@
+"""
+Outils de tracé matplotlib partagés par `data_visualization` et `data_collector`.
+"""
+import numpy as np
+from matplotlib.collections import LineCollection
+
+
+def _compact_rows(years, values):
+    """
+    Ramène en tête de chaque ligne ses points renseignés, dans l'ordre ; la fin de la ligne
+    répète le dernier point renseigné, ce qui n'ajoute aucun segment visible.
+    """
+    observed = ~np.isnan(values)
+    order = np.argsort(~observed, axis=1, kind='stable')
+    last = np.maximum(observed.sum(axis=1) - 1, 0)[:, None]
+    positions = np.take_along_axis(order, np.minimum(np.arange(values.shape[1]), last), axis=1)
+    return np.take_along_axis(years, positions, axis=1), np.take_along_axis(values, positions, axis=1)
+
+
+def add_line_collection(ax, years, values, colors=None, connect_gaps=False, **kwargs):
+    """
+    Dessine toutes les lignes de `values` (une ligne par série) en une seule `LineCollection`.
+    Les NaN interrompent la ligne correspondante sans la relier au point suivant ; avec
+    `connect_gaps=True`, la ligne relie directement les points renseignés de part et d'autre,
+    comme `plt.plot` sur les seules années observées.
+    """
+    values = np.asarray(values, dtype=float)
+    years = np.broadcast_to(np.asarray(years, dtype=float), values.shape)
+    if connect_gaps:
+        years, values = _compact_rows(years, values)
+    segments = np.stack([years, values], axis=-1)
+
+    collection = LineCollection(segments, colors=colors, **kwargs)
+    ax.add_collection(collection)
+    ax.autoscale()
+    return collection
@@ -1,9 +1,26 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import statsmodels.api as sm
 import seaborn as sns
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
+from scipy import stats
+
+from .instrumentation import instrument
 
 
+def _standardized_params(params, X):
+    """
+    Coefficients qu'on obtiendrait en centrant-réduisant les colonnes de `X` : la constante
+    devient la prédiction au point moyen et chaque pente est multipliée par l'écart-type.
+    """
+    means = X.mean().to_numpy()
+    stds = X.std().to_numpy()
+    return np.concatenate([[params[0] + params[1:] @ means], params[1:] * stds])
+
+
+@instrument
 def perform_regression(data, x_cols, y_col, method='HC3', plotnum=0):
     """
     Effectue une régression linéaire multiple et fournit un résumé complet
@@ -48,16 +65,431 @@ def perform_regression(data, x_cols, y_col, method='HC3', plotnum=0):
 
 
 
-    # Calcul des coefficients standardisés pour interprétation relative
-    df_std = df.copy()
-    for col in x_cols:
-        df_std[col] = (df_std[col] - df_std[col].mean()) / df_std[col].std()
-    X_std = sm.add_constant(df_std[x_cols])
-    y_std = df_std[y_col]
-    model_std = sm.OLS(y_std, X_std).fit(method='qr',cov_type=method)
-
+    # Coefficients standardisés pour interprétation relative : centrer-réduire les X revient
+    # à multiplier chaque pente par l'écart-type de sa variable, inutile de réajuster le modèle
     print("\nCoefficients standardisés :")
     print(pd.DataFrame({'Variable': ['const'] + x_cols,
-                        'Coeff_std': model_std.params.values}))
+                        'Coeff_std': _standardized_params(model.params.values, df[x_cols])}))
+
+    return model
+
+_HC_WEIGHTS = {
+    'HC0': lambda e, h, n, p: e**2,
+    'HC1': lambda e, h, n, p: e**2 * (n / (n - p))[:, None],
+    'HC2': lambda e, h, n, p: e**2 / (1 - h),
+    'HC3': lambda e, h, n, p: e**2 / (1 - h)**2,
+}
+
+
+def _pad_groups(values, group_pos, n_groups, width):
+    """
+    Range les lignes de `values` par groupe dans un tableau (groupes × lignes max × ...)
+    complété par des zéros. Les lignes nulles ne changent ni X'X, ni X'y, ni la
+    décomposition QR : chaque groupe s'ajuste comme s'il était seul.
+    """
+    order = np.argsort(group_pos, kind='stable')
+    counts = np.bincount(group_pos, minlength=n_groups)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    sorted_pos = group_pos[order]
+    rows = np.arange(len(order)) - starts[sorted_pos]
+
+    padded = np.zeros((n_groups, width) + values.shape[1:])
+    padded[sorted_pos, rows] = values[order]
+    return padded, counts
+
+
+def _size_buckets(group_pos, n_groups, min_width=1):
+    """
+    Répartit les groupes en paquets de tailles voisines pour limiter le remplissage de
+    `_pad_groups` : un groupe de n lignes va dans le paquet de largeur 2^k ≥ max(n, `min_width`),
+    si bien que le tableau complété compte au plus deux fois plus de lignes que les données
+    (au lieu de groupes × plus grand groupe).
+
+    Retours
+    -------
+    list[tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, int)]
+        Pour chaque paquet : les groupes (positions globales), les lignes concernées, la
+        position de chaque ligne parmi les groupes du paquet, et la largeur.
+    """
+    counts = np.bincount(group_pos, minlength=n_groups)
+    widths = 2 ** np.ceil(np.log2(np.maximum(counts, max(min_width, 1)))).astype(int)
+    local = np.empty(n_groups, dtype=int)
+
+    buckets = []
+    for width in np.unique(widths):
+        groups = np.flatnonzero(widths == width)
+        local[groups] = np.arange(len(groups))
+        rows = np.flatnonzero(widths[group_pos] == width)
+        buckets.append((groups, rows, local[group_pos[rows]], int(width)))
+    return buckets
+
+
+def _grouped_ols(X, y, group_pos, n_groups, method='HC3'):
+    """
+    Ajuste une régression par groupe : QR par blocs sur le plan empilé (groupes × lignes ×
+    variables) puis covariance (robuste ou non) calculée pour tous les groupes à la fois,
+    un paquet de groupes de tailles voisines à la fois (voir `_size_buckets`).
+
+    Retours
+    -------
+    tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        Coefficients (G, p), covariances (G, p, p), effectifs (G,) et sommes des carrés des
+        résidus (G,). Les groupes de rang incomplet ou trop petits valent NaN.
+    """
+    if method != 'nonrobust' and method not in _HC_WEIGHTS:
+        raise ValueError(f"Covariance inconnue : {method}. Choisir parmi 'nonrobust', {', '.join(_HC_WEIGHTS)}.")
+
+    p = X.shape[1]
+    params = np.full((n_groups, p), np.nan)
+    cov = np.full((n_groups, p, p), np.nan)
+    nobs = np.bincount(group_pos, minlength=n_groups)
+    ssr = np.full(n_groups, np.nan)
+
+    for groups, rows, local_pos, width in _size_buckets(group_pos, n_groups, min_width=p):
+        params[groups], cov[groups], _, ssr[groups] = _padded_ols(
+            X[rows], y[rows], local_pos, len(groups), width, method)
+    return params, cov, nobs, ssr
+
+
+def _padded_ols(X, y, group_pos, n_groups, width, method):
+    """
+    `_grouped_ols` sur des groupes complétés à `width` lignes (au moins p).
+    """
+    p = X.shape[1]
+    X_pad, nobs = _pad_groups(X, group_pos, n_groups, width)
+    y_pad, _ = _pad_groups(y, group_pos, n_groups, width)
+
+    Q, R = np.linalg.qr(X_pad)
+    diag = np.abs(np.diagonal(R, axis1=1, axis2=2))
+    tol = diag.max(axis=1, initial=0) * width * np.finfo(float).eps
+    valid = (nobs > p) & (diag > tol[:, None]).all(axis=1)
+
+    # Les groupes invalides sont remplacés par l'identité le temps des inversions
+    R[~valid] = np.eye(p)
+    R_inv = np.linalg.inv(R)
+    params = (R_inv @ np.einsum('gmj,gm->gj', Q, y_pad)[..., None])[..., 0]
+    bread = R_inv @ np.swapaxes(R_inv, 1, 2)
+
+    resid = y_pad - np.einsum('gmi,gi->gm', X_pad, params)
+    ssr = (resid**2).sum(axis=1)
+    df_resid = np.where(valid, nobs - p, 1)
+
+    if method == 'nonrobust':
+        cov = bread * (ssr / df_resid)[:, None, None]
+    else:
+        leverage = (Q**2).sum(axis=2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = _HC_WEIGHTS[method](resid, leverage, nobs, p)
+        weights[(resid == 0) | ~valid[:, None]] = 0
+        meat = np.swapaxes(X_pad * weights[..., None], 1, 2) @ X_pad
+        cov = bread @ meat @ bread
+
+    params[~valid] = np.nan
+    cov[~valid] = np.nan
+    ssr[~valid] = np.nan
+    return params, cov, nobs, ssr
+
+
+def _p_values(stat, df, method):
+    # Comme statsmodels : loi de Student sans correction robuste, loi normale sinon
+    if method == 'nonrobust':
+        return 2 * stats.t.sf(np.abs(stat), df)
+    return 2 * stats.norm.sf(np.abs(stat))
+
+
+@instrument
+def perform_grouped_regression(data, x_cols, y_col, group_col, method='HC3'):
+    """
+    Ajuste la même régression linéaire multiple séparément dans chaque groupe de `group_col`,
+    en une seule passe, et teste l'égalité des coefficients entre groupes.
+
+    Remplace les découpages faits à la main (`dataHighPower`, `dataLowPower`) suivis d'un
+    appel à `perform_regression` par sous-échantillon.
+
+    Paramètres
+    ----------
+    data : pd.DataFrame
+        Dataset contenant les variables explicatives, la variable expliquée et le regroupement.
+    x_cols : list[str]
+        Colonnes explicatives.
+    y_col : str
+        Colonne expliquée.
+    group_col : str ou list[str]
+        Colonne de regroupement (cluster de puissance, enclavement...). Avec une liste, chaque
+        regroupement est traité à son tour et les tables sont empilées (colonne `grouping`).
+    method : str
+        Type de covariance : 'nonrobust', 'HC0', 'HC1', 'HC2' ou 'HC3' (par défaut).
+
+    Returns
+    -------
+    coefficients : pd.DataFrame
+        Une ligne par (groupe, variable) : `group`, `variable`, `coef`, `coef_std` (coefficient
+        standardisé), `std_err`, `stat`, `p_value`, `nobs`. Les groupes trop petits ou dont
+        une variable est constante valent NaN.
+    tests : pd.DataFrame
+        Tests de différence entre groupes : `group_a`, `group_b`, `variable`, `test`, `difference`,
+        `std_err`, `stat`, `df`, `p_value`. Pour chaque paire de groupes, un test par coefficient
+        (`test='z'`) et un test de Wald joint sur tous les coefficients (`test='wald'`,
+        `variable='(all)'`) ; puis le test de Chow global de l'égalité des coefficients dans
+        tous les groupes (`test='chow'`, statistique F, erreurs homoscédastiques).
+    """
+    if not isinstance(group_col, str):
+        results = [perform_grouped_regression(data, x_cols, y_col, col, method=method) for col in group_col]
+        return tuple(
+            pd.concat([table.assign(grouping=col) for col, table in zip(group_col, tables)], ignore_index=True)
+            for tables in zip(*results)
+        )
+
+    df = data[list(dict.fromkeys(x_cols + [y_col, group_col]))].dropna()
+    groups, group_pos = np.unique(df[group_col].to_numpy(), return_inverse=True)
+    variables = ['const'] + x_cols
+
+    X = np.column_stack([np.ones(len(df)), df[x_cols].to_numpy(dtype=float)])
+    y = df[y_col].to_numpy(dtype=float)
+    n_groups, p = len(groups), X.shape[1]
+
+    params, cov, nobs, ssr = _grouped_ols(X, y, group_pos, n_groups, method=method)
+    std_err = np.sqrt(np.diagonal(cov, axis1=1, axis2=2))
+    df_resid = nobs - p
+
+    # Coefficients standardisés, par groupe, sans réajustement (voir `_standardized_params`)
+    moments = df[x_cols].groupby(group_pos).agg(['mean', 'std'])
+    means = moments.xs('mean', axis=1, level=1).to_numpy()
+    stds = moments.xs('std', axis=1, level=1).to_numpy()
+    coef_std = np.column_stack([params[:, 0] + (params[:, 1:] * means).sum(axis=1), params[:, 1:] * stds])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stat = params / std_err
+    coefficients = pd.DataFrame({
+        'group': np.repeat(groups, p),
+        'variable': np.tile(variables, n_groups),
+        'coef': params.ravel(),
+        'coef_std': coef_std.ravel(),
+        'std_err': std_err.ravel(),
+        'stat': stat.ravel(),
+        'p_value': _p_values(stat, df_resid[:, None], method).ravel(),
+        'nobs': np.repeat(nobs, p),
+    })
+
+    # Différences entre paires de groupes (échantillons indépendants : les covariances s'ajoutent)
+    a, b = np.triu_indices(n_groups, k=1)
+    difference = params[a] - params[b]
+    cov_diff = cov[a] + cov[b]
+    diff_se = np.sqrt(np.diagonal(cov_diff, axis1=1, axis2=2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff_stat = difference / diff_se
+
+    pair_ok = ~np.isnan(difference).any(axis=1)
+    wald = np.full(len(a), np.nan)
+    if pair_ok.any():
+        wald[pair_ok] = np.einsum('ki,ki->k', difference[pair_ok],
+                                  np.linalg.solve(cov_diff[pair_ok], difference[pair_ok][..., None])[..., 0])
+
+    pairwise = pd.DataFrame({
+        'group_a': np.repeat(groups[a], p),
+        'group_b': np.repeat(groups[b], p),
+        'variable': np.tile(variables, len(a)),
+        'test': 'z',
+        'difference': difference.ravel(),
+        'std_err': diff_se.ravel(),
+        'stat': diff_stat.ravel(),
+        'df': np.nan,
+        'p_value': 2 * stats.norm.sf(np.abs(diff_stat)).ravel(),
+    })
+    joint = pd.DataFrame({
+        'group_a': groups[a],
+        'group_b': groups[b],
+        'variable': '(all)',
+        'test': 'wald',
+        'difference': np.nan,
+        'std_err': np.nan,
+        'stat': wald,
+        'df': float(p),
+        'p_value': stats.chi2.sf(wald, p),
+    })
+
+    # Test de Chow : modèle commun contre un modèle par groupe (groupes valides seulement)
+    fitted = ~np.isnan(ssr)
+    kept = fitted[group_pos]
+    _, _, _, pooled_ssr = _grouped_ols(X[kept], y[kept], np.zeros(kept.sum(), dtype=int), 1, method='nonrobust')
+    n_fitted = fitted.sum()
+    df_num = (n_fitted - 1) * p
+    df_den = nobs[fitted].sum() - n_fitted * p
+    chow, chow_p = np.nan, np.nan
+    if n_fitted > 1 and df_den > 0:
+        chow = ((pooled_ssr[0] - ssr[fitted].sum()) / df_num) / (ssr[fitted].sum() / df_den)
+        chow_p = stats.f.sf(chow, df_num, df_den)
+    global_test = pd.DataFrame({
+        'group_a': ['(all)'], 'group_b': ['(all)'], 'variable': ['(all)'], 'test': ['chow'],
+        'difference': [np.nan], 'std_err': [np.nan], 'stat': [chow],
+        'df': [float(df_num) if n_fitted > 1 else np.nan], 'p_value': [chow_p],
+    })
+
+    tests = pd.concat([pairwise, joint, global_test], ignore_index=True)
+    return coefficients, tests
+
+
+def _design(data, x_cols):
+    return np.column_stack([np.ones(len(data)), data[x_cols].to_numpy(dtype=float)])
+
+
+def _fold_errors(X, y, train, test):
+    """
+    Ajuste le modèle sur `train` et renvoie les erreurs de prédiction sur `test`.
+    """
+    params = np.linalg.lstsq(X[train], y[train], rcond=None)[0]
+    return y[test] - X[test] @ params
+
+
+def _leave_one_group_out_errors(X, y, group_pos, n_groups):
+    """
+    Erreurs de prédiction hors échantillon lorsque chaque groupe est retiré à tour de rôle,
+    sans réajustement : pour le bloc g de la matrice chapeau, e_(g) = (I - H_gg)⁻¹ e_g.
+    Avec une ligne par groupe, on retrouve e_i / (1 - h_i) (statistique PRESS).
+
+    Si I - H_gg est singulière (une observation de levier 1, par exemple la seule ligne d'une
+    modalité d'indicatrice), le modèle n'est plus identifiable sans le groupe g : ses erreurs
+    valent NaN.
+    """
+    Q, R = np.linalg.qr(X)
+    diag = np.abs(np.diagonal(R))
+    if len(y) <= X.shape[1] or (diag <= diag.max() * max(X.shape) * np.finfo(float).eps).any():
+        return np.full(len(y), np.nan)
+
+    resid = y - Q @ (Q.T @ y)
+    tol = np.finfo(float).eps ** 0.5
+
+    if np.bincount(group_pos, minlength=n_groups).max() == 1:
+        one_minus_h = 1 - (Q**2).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(one_minus_h > tol, resid / one_minus_h, np.nan)
+
+    errors = np.full(len(y), np.nan)
+    for groups, rows, local_pos, width in _size_buckets(group_pos, n_groups):
+        Q_pad, nobs = _pad_groups(Q[rows], local_pos, len(groups), width)
+        resid_pad, _ = _pad_groups(resid[rows], local_pos, len(groups), width)
+        # I - H_gg est symétrique, de valeurs propres 1 - (leviers propres) dans [0, 1] ;
+        # les lignes de remplissage ajoutent des valeurs propres égales à 1
+        I_H = np.eye(width) - Q_pad @ np.swapaxes(Q_pad, 1, 2)
+        solvable = np.linalg.eigvalsh(I_H)[:, 0] > width * tol
+
+        I_H[~solvable] = np.eye(width)
+        errors_pad = np.linalg.solve(I_H, resid_pad[..., None])[..., 0]
+        errors_pad[~solvable] = np.nan
+
+        # On relit les erreurs dans l'ordre des lignes
+        order = np.argsort(local_pos, kind='stable')
+        starts = np.concatenate([[0], np.cumsum(nobs)[:-1]])
+        sorted_pos = local_pos[order]
+        errors[rows[order]] = errors_pad[sorted_pos, np.arange(len(rows)) - starts[sorted_pos]]
+    return errors
+
+
+@instrument
+def cross_validate_specifications(data, specifications, y_col, k=5, group_col='country', seed=0, workers=None,
+                                  executor=None):
+    """
+    Compare des spécifications de régression par leurs erreurs de prédiction hors échantillon.
+
+    Deux validations croisées sont menées sur le même échantillon (les lignes renseignées pour
+    toutes les spécifications) :
+
+    - k-fold : les groupes de `group_col` sont répartis au hasard en `k` blocs, chaque bloc est
+      prédit par le modèle ajusté sur les autres. Les k × (nombre de spécifications) ajustements
+      peuvent être répartis sur un pool (`workers` ou `executor`) ;
+    - leave-one-out par groupe (un pays à la fois) : calculé sans réajustement à partir de la
+      matrice chapeau de l'ajustement complet. Les groupes sans lesquels le modèle n'est plus
+      identifiable sont exclus de `rmse_loo` et `mae_loo` (voir `n_loo`).
+
+    Paramètres
+    ----------
+    data : pd.DataFrame
+        Dataset contenant toutes les colonnes des spécifications, `y_col` et `group_col`.
+    specifications : dict ou list
+        {nom : colonnes explicatives}, ou une liste de listes de colonnes (nommées
+        'spec_0', 'spec_1'...). Une constante est ajoutée, comme dans `perform_regression`.
+    y_col : str
+        Colonne expliquée.
+    k : int
+        Nombre de blocs du k-fold (5 par défaut).
+    group_col : str, optional
+        Les lignes d'un même groupe restent ensemble dans les blocs et dans le leave-one-out.
+        None : chaque ligne est son propre groupe.
+    seed : int
+        Graine de la répartition en blocs (identique pour toutes les spécifications).
+    workers : int, optional
+        Nombre de threads pour les ajustements du k-fold (séquentiel par défaut ; lstsq relâche
+        le GIL).
+    executor : concurrent.futures.Executor, optional
+        Pool déjà ouvert sur lequel répartir les ajustements (prioritaire sur `workers`).
+
+    Returns
+    -------
+    summary : pd.DataFrame
+        Une ligne par spécification : `specification`, `n_obs`, `n_params`, `r2`, `rmse_in`
+        (dans l'échantillon), `rmse_kfold`, `mae_kfold`, `n_loo` (lignes prédites en
+        leave-one-out), `rmse_loo`, `mae_loo`.
+    folds : pd.DataFrame
+        Une ligne par (spécification, bloc) : `specification`, `fold`, `n_test`, `rmse`, `mae`.
+    """
+    if not isinstance(specifications, dict):
+        specifications = {f'spec_{i}': list(x_cols) for i, x_cols in enumerate(specifications)}
+
+    columns = list(dict.fromkeys(
+        [col for x_cols in specifications.values() for col in x_cols] + [y_col] + ([group_col] if group_col else [])
+    ))
+    df = data[columns].dropna().reset_index(drop=True)
+    y = df[y_col].to_numpy(dtype=float)
+
+    if group_col:
+        _, group_pos = np.unique(df[group_col].to_numpy(), return_inverse=True)
+    else:
+        group_pos = np.arange(len(df))
+    n_groups = group_pos.max() + 1 if len(df) else 0
+
+    rng = np.random.default_rng(seed)
+    fold_of_row = (rng.permutation(n_groups) % k)[group_pos]
+    designs = {name: _design(df, x_cols) for name, x_cols in specifications.items()}
+
+    tasks = [(name, fold) for name in specifications for fold in range(k)]
+
+    def run(task):
+        name, fold = task
+        return _fold_errors(designs[name], y, fold_of_row != fold, fold_of_row == fold)
+
+    if executor is not None:
+        fold_errors = list(executor.map(run, tasks))
+    elif workers:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            fold_errors = list(pool.map(run, tasks))
+    else:
+        fold_errors = [run(task) for task in tasks]
+
+    folds = pd.DataFrame({
+        'specification': [name for name, _ in tasks],
+        'fold': [fold for _, fold in tasks],
+        'n_test': [len(errors) for errors in fold_errors],
+        'rmse': [np.sqrt(np.mean(errors**2)) if len(errors) else np.nan for errors in fold_errors],
+        'mae': [np.mean(np.abs(errors)) if len(errors) else np.nan for errors in fold_errors],
+    })
+
+    rows = []
+    for i, (name, X) in enumerate(designs.items()):
+        kfold = np.concatenate(fold_errors[i * k:(i + 1) * k])
+        loo = _leave_one_group_out_errors(X, y, group_pos, n_groups)
+        loo = loo[~np.isnan(loo)]
+        resid = _fold_errors(X, y, slice(None), slice(None))
+        rows.append({
+            'specification': name,
+            'n_obs': len(y),
+            'n_params': X.shape[1],
+            'r2': 1 - (resid**2).sum() / ((y - y.mean())**2).sum(),
+            'rmse_in': np.sqrt(np.mean(resid**2)),
+            'rmse_kfold': np.sqrt(np.mean(kfold**2)),
+            'mae_kfold': np.mean(np.abs(kfold)),
+            'n_loo': len(loo),
+            'rmse_loo': np.sqrt(np.mean(loo**2)) if len(loo) else np.nan,
+            'mae_loo': np.mean(np.abs(loo)) if len(loo) else np.nan,
+        })
 
-    return
\ No newline at end of file
+    return pd.DataFrame(rows), folds
@@ -0,0 +1,286 @@
+"""
+Indicateurs glissants de résilience calculés sur la matrice pays × années.
+
+Le panel long est pivoté une seule fois en un cube (indicateurs × pays × années) sur des
+années contiguës, puis chaque indicateur est obtenu pour tous les pays et tous les
+indicateurs à la fois, le long du dernier axe :
+
+- croissance sur un an (`growth`) ;
+- volatilité glissante de la croissance (`rolling_volatility`), via des sommes cumulées ;
+- drawdown par rapport au plus haut atteint (`drawdown`), drawdown maximal sur une fenêtre
+  glissante (`max_drawdown`, vues à pas fixes de `sliding_window_view`) ;
+- durée depuis le dernier plus haut (`drawdown_duration`) et part du temps passé sous ce
+  plus haut (`time_under_water`).
+
+Les valeurs manquantes sont respectées : une croissance n'est définie que si les deux années
+sont observées, les fenêtres ne comptent que les années renseignées (`min_periods`), et le
+plus haut atteint ignore les trous. Les années absentes du panel valent NaN dans le cube,
+si bien que les fenêtres portent toujours sur des années civiles.
+"""
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .instrumentation import instrument
+
+
+def panel_cube(data, cols, index_col='country', date_col='date'):
+    """
+    Pivote un panel long en cube (indicateurs × pays × années).
+
+    Paramètres
+    ----------
+    data : pandas.DataFrame
+        Le panel, avec les colonnes `index_col`, `date_col` et `cols`.
+    cols : list[str]
+        Les indicateurs à empiler.
+
+    Retours
+    -------
+    tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        - le cube de forme (len(cols), pays, années), NaN pour les cellules absentes ;
+        - les pays (triés) ;
+        - les années, contiguës du minimum au maximum observés.
+        Si un couple (pays, année) apparaît plusieurs fois, la dernière ligne l'emporte.
+    """
+    countries, country_pos = np.unique(data[index_col].to_numpy(), return_inverse=True)
+    dates = data[date_col].to_numpy(dtype=int)
+    years = np.arange(dates.min(), dates.max() + 1)
+
+    cube = np.full((len(cols), len(countries), len(years)), np.nan)
+    cube[:, country_pos, dates - years[0]] = data[cols].to_numpy(dtype=float).T
+    return cube, countries, years
+
+
+def _shift(values, periods=1):
+    shifted = np.full_like(values, np.nan)
+    shifted[..., periods:] = values[..., :-periods]
+    return shifted
+
+
+def _window_sums(values, window):
+    """
+    Sommes glissantes sur `window` années (NaN comptés comme 0) et nombre de valeurs
+    renseignées, par différence de sommes cumulées.
+    """
+    observed = ~np.isnan(values)
+    T = values.shape[-1]
+    start = np.maximum(np.arange(1, T + 1) - window, 0)
+
+    def rolling(x):
+        cumsum = np.concatenate([np.zeros(x.shape[:-1] + (1,)), np.cumsum(x, axis=-1)], axis=-1)
+        return cumsum[..., 1:] - cumsum[..., start]
+
+    return rolling(np.where(observed, values, 0.0)), rolling(observed.astype(float)), observed
+
+
+def growth(values, periods=1):
+    """
+    Croissance entre t - `periods` et t ; NaN si l'une des deux valeurs manque ou si la
+    valeur de départ est nulle.
+    """
+    previous = _shift(values, periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = values / previous - 1
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+def rolling_mean(values, window, min_periods=None):
+    """
+    Moyenne glissante sur `window` années, NaN si moins de `min_periods` valeurs renseignées
+    (par défaut `window`, comme pandas).
+    """
+    min_periods = window if min_periods is None else min_periods
+    sums, counts, _ = _window_sums(values, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = sums / counts
+    out[counts < max(min_periods, 1)] = np.nan
+    return out
+
+
+def rolling_std(values, window, min_periods=None, ddof=1):
+    """
+    Écart-type glissant sur `window` années (`ddof=1` par défaut, comme pandas).
+
+    Les séries sont d'abord centrées sur leur moyenne, ce qui limite les erreurs
+    d'arrondi de la formule E[x²] - E[x]².
+    """
+    min_periods = window if min_periods is None else min_periods
+    observed = ~np.isnan(values)
+    counts = observed.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        center = np.where(counts > 0, np.where(observed, values, 0.0).sum(axis=-1, keepdims=True) / counts, 0.0)
+    centered = values - center
+
+    sums, n, _ = _window_sums(centered, window)
+    squares, _, _ = _window_sums(centered**2, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var = (squares - sums**2 / n) / (n - ddof)
+    out = np.sqrt(np.maximum(var, 0.0))
+    out[n < max(min_periods, ddof + 1)] = np.nan
+    return out
+
+
+def rolling_volatility(values, window=5, min_periods=None):
+    """
+    Volatilité glissante : écart-type de la croissance annuelle sur `window` années.
+    """
+    return rolling_std(growth(values), window, min_periods=min_periods)
+
+
+def drawdown(values):
+    """
+    Écart relatif (négatif ou nul) au plus haut atteint jusqu'ici ; NaN pour les valeurs
+    manquantes et lorsque le plus haut n'est pas strictement positif.
+    """
+    peak = np.fmax.accumulate(values, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = values / peak - 1
+    out[~(peak > 0)] = np.nan
+    return out
+
+
+def max_drawdown(values, window=None, min_periods=None):
+    """
+    Drawdown maximal (le plus négatif).
+
+    Paramètres
+    ----------
+    values : numpy.ndarray
+        Les séries, les années sur le dernier axe.
+    window : int, optional
+        Si fourni, drawdown maximal sur chaque fenêtre glissante de `window` années (le plus
+        haut est pris dans la fenêtre), aligné sur la dernière année de la fenêtre. Sinon, un
+        seul drawdown maximal par série, depuis son début.
+    min_periods : int, optional
+        Avec `window` : NaN si la fenêtre compte moins de `min_periods` valeurs renseignées
+        (par défaut `window`, comme `rolling_mean` et pandas).
+
+    Retours
+    -------
+    numpy.ndarray
+        Même forme que `values` avec `window`, sans le dernier axe sinon.
+    """
+    if window is None:
+        return np.fmin.reduce(drawdown(values), axis=-1)
+
+    min_periods = window if min_periods is None else min_periods
+    # Les premières années sont précédées de NaN : chacune a sa fenêtre (partielle)
+    padding = np.full(values.shape[:-1] + (window - 1,), np.nan)
+    windows = sliding_window_view(np.concatenate([padding, values], axis=-1), window, axis=-1)
+    out = np.fmin.reduce(drawdown(windows), axis=-1)
+
+    _, counts, _ = _window_sums(values, window)
+    out[counts < max(min_periods, 1)] = np.nan
+    return out
+
+
+def drawdown_duration(values):
+    """
+    Nombre d'années écoulées depuis le dernier plus haut (0 l'année d'un nouveau plus haut),
+    NaN pour les valeurs manquantes.
+    """
+    observed = ~np.isnan(values)
+    peak = np.fmax.accumulate(values, axis=-1)
+    years = np.arange(values.shape[-1])
+
+    last_peak = np.maximum.accumulate(np.where(observed & (values >= peak), years, -1), axis=-1)
+    out = (years - last_peak).astype(float)
+    out[~observed | (last_peak < 0)] = np.nan
+    return out
+
+
+def time_under_water(values, window=None, min_periods=1):
+    """
+    Part des années renseignées passées sous le plus haut atteint.
+
+    Avec `window`, part glissante sur `window` années ; sinon une part par série.
+    """
+    underwater = np.where(np.isnan(values), np.nan, (drawdown(values) < 0).astype(float))
+    if window is not None:
+        return rolling_mean(underwater, window, min_periods=min_periods)
+
+    counts = (~np.isnan(underwater)).sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(counts > 0, np.nansum(underwater, axis=-1) / counts, np.nan)
+
+
+@instrument
+def compute_rolling_indicators(data, cols, window=5, min_periods=None, index_col='country', date_col='date'):
+    """
+    Calcule les indicateurs glissants de résilience pour chaque ligne du panel.
+
+    Paramètres
+    ----------
+    data : pandas.DataFrame
+        Le panel long, avec les colonnes `index_col`, `date_col` et `cols`.
+    cols : list[str]
+        Les indicateurs (par exemple ['PIB', 'Exportations']).
+    window : int, défaut=5
+        La taille des fenêtres glissantes, en années.
+    min_periods : int, optional
+        Nombre minimal d'années renseignées dans une fenêtre pour la volatilité et le drawdown
+        maximal glissant (par défaut `window`).
+
+    Retours
+    -------
+    pandas.DataFrame
+        Même index que `data`, avec `index_col`, `date_col` puis, pour chaque indicateur `col` :
+        `growth_{col}`, `volatility_{col}`, `drawdown_{col}`, `maxDrawdown_{col}` (sur la fenêtre),
+        `drawdownDuration_{col}` et `timeUnderWater_{col}` (sur la fenêtre).
+    """
+    cube, countries, years = panel_cube(data, cols, index_col=index_col, date_col=date_col)
+
+    indicators = {
+        "growth": growth(cube),
+        "volatility": rolling_volatility(cube, window, min_periods=min_periods),
+        "drawdown": drawdown(cube),
+        "maxDrawdown": max_drawdown(cube, window=window, min_periods=min_periods),
+        "drawdownDuration": drawdown_duration(cube),
+        "timeUnderWater": time_under_water(cube, window=window),
+    }
+
+    # On relit les cellules du cube aux positions des lignes d'origine
+    rows = np.searchsorted(countries, data[index_col].to_numpy())
+    positions = data[date_col].to_numpy(dtype=int) - years[0]
+
+    result = data[[index_col, date_col]].copy()
+    for i, col in enumerate(cols):
+        for name, values in indicators.items():
+            result[f"{name}_{col}"] = values[i, rows, positions]
+    return result
+
+
+@instrument
+def summarize_resilience(data, cols, index_col='country', date_col='date'):
+    """
+    Résume la résilience de chaque pays sur toute la période.
+
+    Paramètres
+    ----------
+    data : pandas.DataFrame
+        Le panel long, avec les colonnes `index_col`, `date_col` et `cols`.
+    cols : list[str]
+        Les indicateurs à résumer.
+
+    Retours
+    -------
+    pandas.DataFrame
+        Une ligne par pays, avec pour chaque indicateur `col` : `volatility_{col}` (écart-type de la
+        croissance), `maxDrawdown_{col}`, `maxDrawdownDuration_{col}` et `timeUnderWater_{col}`.
+    """
+    cube, countries, _ = panel_cube(data, cols, index_col=index_col, date_col=date_col)
+    # Une fenêtre couvrant toute la période : la dernière valeur est l'écart-type complet
+    summary = {
+        "volatility": rolling_std(growth(cube), cube.shape[-1], min_periods=2)[..., -1],
+        "maxDrawdown": max_drawdown(cube),
+        "maxDrawdownDuration": np.fmax.reduce(drawdown_duration(cube), axis=-1),
+        "timeUnderWater": time_under_water(cube),
+    }
+
+    result = pd.DataFrame({index_col: countries})
+    for i, col in enumerate(cols):
+        for name, values in summary.items():
+            result[f"{name}_{col}"] = values[i]
+    return result
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from scripts.data_analysis import SharedPanelExecutor
+from scripts.data_visualization import cluster_per_year
+
+
+def test_cluster_per_year_executor_matches_sequential_with_missing_dates():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({
+        "country": np.tile([f"C{i}" for i in range(30)], 6),
+        "date": np.repeat(np.arange(2000, 2006), 30).astype(float),
+        "weightCountry": rng.random(180),
+    })
+    data.loc[rng.choice(len(data), 15, replace=False), "date"] = np.nan
+    data = data.sample(frac=1, random_state=0)
+
+    sequential = cluster_per_year(data, "weightCountry", "Power", 3)
+    with SharedPanelExecutor(max_workers=2) as executor:
+        parallel = cluster_per_year(data, "weightCountry", "Power", 3, executor=executor)
+
+    assert sequential["date"].notna().all()
+    pd.testing.assert_frame_equal(sequential, parallel)